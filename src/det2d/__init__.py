@@ -1,10 +1,12 @@
-from .read import read_tracklets, read_detections
+from .read import read_tracklets, read_detections, read_detections_soa
 from .convert import detections2tracklets, tracklets2detections
 from .stack import stack_tracklets
-from .fill import interpolate_tracklet_gaps, zero_tracklet_gaps, interpolate_tracklets_gaps, zero_tracklets_gaps
+from .fill import interpolate_tracklet_gaps, zero_tracklet_gaps, interpolate_tracklets_gaps, zero_tracklets_gaps, interpolate_stacked_tracklets_gaps
 from .window import tracklet_window, tracklets_window, stacked_tracklets_window, tracklet_window_overlap
 from .verify import assert_tracklet_valid, assert_tracklets_valid, assert_stacked_tracklets_valid, assert_tracklets_comparable
 from .keys import Keys
+from .dtype import KP_DTYPE
+from .buffer import release_buffer
 from .categories import read_categories, read_category_keypoints, read_category_details
 from .mask import tracklet_confidence_mask, tracklet_unpadded_mask, tracklet_confidence_and_unpadded_mask, stacked_tracklets_confidence_mask, stacked_tracklets_unpadded_mask, stacked_tracklets_confidence_and_unpadded_mask
 from .loader import DetectionLoader, TrackletLoader
\ No newline at end of file
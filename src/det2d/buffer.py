@@ -0,0 +1,36 @@
+import numpy as np
+
+_buffer_pool = {} # Released keypoint buffers, per (shape, dtype)
+_max_pooled_buffers = 4 # Maximum number of released buffers kept per (shape, dtype)
+
+def release_buffer(buffer: np.ndarray):
+    '''
+    Return a keypoint buffer, e.g. the keypoints of stacked tracklets that are no longer used, so that later stacking or windowing calls can reuse it instead of allocating a new one. The buffer must not be used after releasing it.
+
+    Inputs:
+    - buffer: the keypoint array to release
+    '''
+    assert isinstance(buffer, np.ndarray), f"buffer must be an ndarray, but was a {type(buffer)}"
+    if not buffer.flags.owndata or not buffer.flags.c_contiguous: return # Views share memory with other arrays, so they can't be reused
+
+    pooled_buffers = _buffer_pool.setdefault((buffer.shape, buffer.dtype), [])
+    if len(pooled_buffers) < _max_pooled_buffers and not any(pooled_buffer is buffer for pooled_buffer in pooled_buffers): pooled_buffers.append(buffer)
+
+def _get_buffer(shape: tuple, dtype: type, zero: bool=True) -> np.ndarray:
+    '''
+    Get a keypoint buffer from the released buffers, or allocate a new one
+
+    Inputs:
+    - shape: the buffer shape
+    - dtype: the buffer dtype
+    - zero: whether to fill the buffer with zeros. If False, its contents are undefined
+
+    Outputs:
+    - The buffer
+    '''
+    pooled_buffers = _buffer_pool.get((tuple(shape), np.dtype(dtype)))
+    if not pooled_buffers: return np.zeros(shape=shape, dtype=dtype) if zero else np.empty(shape=shape, dtype=dtype)
+
+    buffer = pooled_buffers.pop()
+    if zero: buffer[...] = 0
+    return buffer
\ No newline at end of file
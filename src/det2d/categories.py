@@ -1,4 +1,7 @@
 from types import SimpleNamespace
+import functools
+import copy
+import os
 import json
 from .keys import Keys
 
@@ -10,13 +13,9 @@ def read_categories(path: str) -> SimpleNamespace:
     - path: path to the categories
     
     Outputs:
-    - Namespace with category indices
+    - Namespace with category indices. It is shared between calls with the same path and must not be modified
     '''
-    categories_dict = read_category_details(path)
-    categories_dict = {key: index for index, key in enumerate(categories_dict.keys())}
-    categories_namespace = SimpleNamespace(**categories_dict)
-    
-    return categories_namespace
+    return _build_categories(path, os.path.getmtime(path))
 
 def read_category_keypoints(path: str, category: int) -> SimpleNamespace:
     '''
@@ -27,13 +26,9 @@ def read_category_keypoints(path: str, category: int) -> SimpleNamespace:
     - category: integer representing the wanted category, obtained from read_categories()
     
     Outputs:
-    - Namespace with keypoint indices from the category
+    - Namespace with keypoint indices from the category. It is shared between calls with the same path and category and must not be modified
     '''
-    categories_dict = read_category_details(path)
-    keypoints_dict = {key: index for index, key in enumerate(list(categories_dict.values())[category][Keys.keypoints])}
-    keypoints_namespace = SimpleNamespace(**keypoints_dict)
-    
-    return keypoints_namespace
+    return _build_category_keypoints(path, os.path.getmtime(path), category)
 
 def read_category_details(path: str) -> dict:
     '''
@@ -45,5 +40,46 @@ def read_category_details(path: str) -> dict:
     Outputs:
     - dict corresponding to the json structure in path
     '''
+    return copy.deepcopy(_load_category_details(path, os.path.getmtime(path)))
+
+@functools.lru_cache(maxsize=32)
+def _build_categories(path: str, mtime: float) -> SimpleNamespace:
+    """
+    Build the category namespace of a cats.json file, memoized on its path and modification time
+    
+    Inputs:
+    - path: path to the categories
+    - mtime: modification time of the file at path, used as part of the cache key
+    """
+    categories_dict = _load_category_details(path, mtime)
+    categories_namespace = SimpleNamespace(**dict(zip(categories_dict.keys(), range(len(categories_dict)))))
+    
+    return categories_namespace
+
+@functools.lru_cache(maxsize=256)
+def _build_category_keypoints(path: str, mtime: float, category: int) -> SimpleNamespace:
+    """
+    Build the keypoint namespace of a category from a cats.json file, memoized on its path, modification time and category
+    
+    Inputs:
+    - path: path to the categories
+    - mtime: modification time of the file at path, used as part of the cache key
+    - category: integer representing the wanted category, obtained from read_categories()
+    """
+    categories_dict = _load_category_details(path, mtime)
+    keypoints = list(categories_dict.values())[category][Keys.keypoints]
+    keypoints_namespace = SimpleNamespace(**dict(zip(keypoints, range(len(keypoints)))))
+    
+    return keypoints_namespace
+
+@functools.lru_cache(maxsize=32)
+def _load_category_details(path: str, mtime: float) -> dict:
+    """
+    Parse a cats.json file, memoized on its path and modification time
+    
+    Inputs:
+    - path: path to the categories
+    - mtime: modification time of the file at path, used as part of the cache key
+    """
     with open(path, 'r') as f: categories_dict = json.load(f)
     return categories_dict
\ No newline at end of file
@@ -1,9 +1,11 @@
 import numpy as np
 from types import FunctionType
+from operator import itemgetter
 from tqdm import tqdm
 from .fill import zero_tracklet_gaps
 from .verify import assert_tracklet_valid
 from .keys import Keys
+from .dtype import KP_DTYPE
 
 def detections2tracklets(poses: dict, fill_function: FunctionType=zero_tracklet_gaps, confidence_threshold: float=0, frame_range: range=None, verbose: bool=False) -> dict:
     '''
@@ -22,7 +24,7 @@ def detections2tracklets(poses: dict, fill_function: FunctionType=zero_tracklet_
     assert callable(fill_function), f"fill_function must be callable, but has type {type(fill_function)}"
     assert frame_range is None or frame_range.step==1, f"frame_range must have a step size of 1, but this was {frame_range.step}"
     
-    if frame_range is not None: pose_items = {frame: poses[frame] for frame in frame_range if frame in poses.keys()}.items()
+    if frame_range is not None: pose_items = {frame: poses[frame] for frame in frame_range if frame in poses}.items()
     else: pose_items = poses.items()
     
     if verbose: pose_items = tqdm(pose_items, desc="detections -> tracklets")
@@ -31,22 +33,25 @@ def detections2tracklets(poses: dict, fill_function: FunctionType=zero_tracklet_
     
     for frame, frame_dictionary in pose_items:
         for category, category_list in frame_dictionary.items():
-            if category not in tracklets.keys(): tracklets[category] = {}
+            if category not in tracklets: tracklets[category] = {}
             for pose in category_list:
                 pose_id, pose_keypoints = pose[Keys.id], pose[Keys.keypoints]
                 
-                if pose_id not in tracklets[category].keys():
+                if pose_id not in tracklets[category]:
                     tracklets[category][pose_id]={
-                        Keys.keypoints: np.zeros(shape=(0,*pose_keypoints.shape)),
-                        Keys.frames: np.zeros(shape=(0,), dtype=int)
+                        Keys.keypoints: [],
+                        Keys.frames: []
                     }
                 
-                tracklets[category][pose_id][Keys.keypoints] = np.vstack((tracklets[category][pose_id][Keys.keypoints], pose[Keys.keypoints][None,:,:]))
-                tracklets[category][pose_id][Keys.frames]    = np.append(tracklets[category][pose_id][Keys.frames], frame)
+                tracklets[category][pose_id][Keys.keypoints].append(pose_keypoints)
+                tracklets[category][pose_id][Keys.frames].append(frame)
     
     for category, category_dict in tracklets.items():
-        for tracklet_id in category_dict.keys():
-            category_dict[tracklet_id] = fill_function(category_dict[tracklet_id], confidence_threshold)
+        for tracklet_id, tracklet in category_dict.items():
+            # Convert the accumulated lists to arrays once, instead of growing arrays on every frame
+            tracklet[Keys.keypoints] = np.stack(tracklet[Keys.keypoints], axis=0).astype(KP_DTYPE, copy=False)
+            tracklet[Keys.frames]    = np.asarray(tracklet[Keys.frames], dtype=int)
+            category_dict[tracklet_id] = fill_function(tracklet, confidence_threshold)
     
     return tracklets
     
@@ -67,19 +72,15 @@ def tracklets2detections(tracklets: dict, verbose: bool=False) -> dict:
         for tracklet_id, tracklet in category_dictionary_items:
             assert_tracklet_valid(tracklet)
             
-            keypoints = tracklet[Keys.keypoints].copy()
-            frames = np.arange(keypoints.shape[0])+tracklet[Keys.start]
-            nonzero_pose_mask = np.sum(keypoints[:,:,2], axis=1)>0
-            keypoints = keypoints[nonzero_pose_mask]
-            frames = frames[nonzero_pose_mask]
+            nonzero_pose_indices = np.flatnonzero(np.any(tracklet[Keys.keypoints][:,:,2]>0, axis=1))
+            keypoints = tracklet[Keys.keypoints][nonzero_pose_indices] # Fancy indexing copies, so detections don't share memory with the tracklet
+            frames = (nonzero_pose_indices+tracklet[Keys.start]).tolist()
             for frame, keypoint in zip(frames, keypoints):
-                if frame not in detections.keys(): detections[frame] = {}
-                if category not in detections[frame].keys(): detections[frame][category] = []
-                detections[frame][category].append({
+                detections.setdefault(frame, {}).setdefault(category, []).append({
                     Keys.keypoints: keypoint,
                     Keys.id: tracklet_id
                 })
                 
-    detections = dict(sorted(detections.items()))
+    detections = dict(sorted(detections.items(), key=itemgetter(0)))
     
     return detections
\ No newline at end of file
@@ -0,0 +1,3 @@
+import numpy as np
+
+KP_DTYPE = np.float32 # dtype of keypoint arrays; float32 holds keypoint coordinates and confidences accurately, at half the memory traffic of float64
\ No newline at end of file
@@ -2,8 +2,7 @@ from types import FunctionType
 import numpy as np
 import scipy as sp
 from .keys import Keys
-
-transpose_frames_keypoints = (1,0,2)
+from .dtype import KP_DTYPE
 
 def interpolate_tracklet_gaps(tracklet: dict, confidence_threshold: float=0) -> dict:
     '''
@@ -21,21 +20,67 @@ def interpolate_tracklet_gaps(tracklet: dict, confidence_threshold: float=0) ->
     start, keypoints = filled_tracklet[Keys.start], filled_tracklet[Keys.keypoints]
     
     interpolated_tracklet = {
-        Keys.keypoints: np.zeros_like(keypoints),
+        Keys.keypoints: _interpolate_keyframes(keypoints, keyframes),
         Keys.start: start,
         Keys.prepadding: filled_tracklet[Keys.prepadding],
         Keys.postpadding: filled_tracklet[Keys.postpadding]
     }
     
-    for k, (keypoints_per_class, keyframes_per_class) in enumerate(zip(keypoints.transpose(transpose_frames_keypoints), keyframes.T)):
-        keyframes_per_class = np.nonzero(keyframes_per_class)[0]
-        
-        if len(keyframes_per_class) >= 2:
-            interpolator = sp.interpolate.interp1d(keyframes_per_class, keypoints_per_class[keyframes_per_class], axis=0, bounds_error=False, fill_value=0)
-            interpolated_tracklet[Keys.keypoints][:,k] = interpolator(range(keypoints.shape[0]))
-        interpolated_tracklet[Keys.keypoints][keyframes_per_class,k] = keypoints_per_class[keyframes_per_class]
-        
     return interpolated_tracklet
+
+def interpolate_stacked_tracklets_gaps(stacked_tracklets: dict, confidence_threshold: float=0) -> dict:
+    '''
+    Use linear spline interpolation to fill low-confidence keypoints in stacked tracklets, interpolating all tracklets at once.
+    Gives the same keypoints as interpolate_tracklet_gaps on each of the tracklets before stacking.
+    
+    Inputs:
+    - stacked_tracklets: stacked tracklets to fill gaps in, obtained from stack_tracklets()
+    - confidence_threshold: threshold between 0 and 1, below which a keypoint is assumed not to be detected
+    
+    Outputs:
+    - stacked tracklets whose gaps were interpolated
+    '''
+    assert confidence_threshold>=0 and confidence_threshold<=1, f"confidence_threshold must be between 0 and 1, but was {confidence_threshold}"
+    
+    keypoints = stacked_tracklets[Keys.keypoints]
+    D, F, K = keypoints.shape[:3]
+    
+    # Treat every keypoint of every tracklet as a separate channel of one [F,D*K] tracklet
+    channel_keypoints = keypoints.transpose(1,0,2,3).reshape(F,D*K,3)
+    channel_keyframes = channel_keypoints[:,:,2] >= confidence_threshold
+    interpolated_keypoints = _interpolate_keyframes(channel_keypoints, channel_keyframes).reshape(F,D,K,3).transpose(1,0,2,3)
+    
+    return stacked_tracklets | {Keys.keypoints: np.ascontiguousarray(interpolated_keypoints)}
+
+def _interpolate_keyframes(keypoints: np.ndarray, keyframes: np.ndarray) -> np.ndarray:
+    '''
+    Linearly interpolate keypoints between their keyframes, and set them to zero outside of the keyframe range
+    
+    Inputs:
+    - keypoints: the keypoints to interpolate, shape [F,K,3] where F is the number of frames and K the number of keypoints
+    - keyframes: mask which is True where keypoints are known and False where they must be interpolated, shape [F,K]
+    
+    Outputs:
+    - the interpolated keypoints, shape [F,K,3]
+    '''
+    interpolated_keypoints = np.zeros_like(keypoints)
+    
+    # Keypoints usually share their keyframes, so interpolate all keypoints with the same keyframes at once
+    keyframe_patterns, keyframe_pattern_indices = np.unique(keyframes, axis=1, return_inverse=True)
+    keyframe_pattern_indices = keyframe_pattern_indices.reshape(-1)
+    frames = np.arange(keypoints.shape[0])
+    
+    for p, keyframe_pattern in enumerate(keyframe_patterns.T):
+        keyframes_per_pattern = np.nonzero(keyframe_pattern)[0]
+        keypoints_per_pattern = np.nonzero(keyframe_pattern_indices==p)[0]
+        
+        if len(keyframes_per_pattern) >= 2:
+            interpolator = sp.interpolate.interp1d(keyframes_per_pattern, keypoints[keyframes_per_pattern][:,keypoints_per_pattern], axis=0, bounds_error=False, fill_value=0)
+            interpolated_keypoints[:,keypoints_per_pattern] = interpolator(frames) # Linear interpolation reproduces the keyframes themselves
+        else:
+            interpolated_keypoints[np.ix_(keyframes_per_pattern,keypoints_per_pattern)] = keypoints[np.ix_(keyframes_per_pattern,keypoints_per_pattern)]
+    
+    return interpolated_keypoints
     
 def zero_tracklet_gaps(tracklet: dict, confidence_threshold: float=0) -> dict:
     '''
@@ -66,32 +111,36 @@ def prepare_filled_tracklet(tracklet: dict, confidence_threshold: float=0) -> di
     '''
     assert confidence_threshold>=0 and confidence_threshold<=1, f"confidence_threshold must be between 0 and 1, but was {confidence_threshold}"
     
-    if Keys.start in tracklet.keys():
+    if Keys.start in tracklet:
         return tracklet, tracklet[Keys.keypoints][:,:,2] >= confidence_threshold
     
     keypoints = tracklet[Keys.keypoints]
-    frames = tracklet[Keys.frames] if Keys.frames in tracklet.keys() else np.arange(len(keypoints))+tracklet[Keys.start]
+    frames = tracklet[Keys.frames] if Keys.frames in tracklet else np.arange(len(keypoints))+tracklet[Keys.start]
     
     sort_frames = np.argsort(frames)
     frames = frames[sort_frames]
-    keypoints = keypoints.copy()[sort_frames]
+    keypoints = keypoints[sort_frames] # Fancy indexing already copies, so keypoints can be modified below
     
     detected = keypoints[:,:,2]>=confidence_threshold
     keypoints[~detected]=0
     
-    filled_frames = np.arange(frames[0], frames[-1]+1)
-    filled_keypoints = np.zeros(shape=(len(filled_frames), keypoints.shape[1], 3), dtype=float)
-    filled_keypoints[frames-frames[0]] = keypoints
-    
-    keypoint_keyframes = np.zeros(shape=(*filled_frames.shape, keypoints.shape[1]), dtype=bool)
-    keypoint_keyframes[frames-frames[0]] = True
-    keypoint_keyframes[frames-frames[0]][~detected] = False
+    n_filled_frames = int(frames[-1]-frames[0])+1
+    if len(frames) == n_filled_frames and np.all(np.diff(frames)==1): # No frames are missing, so the sorted keypoints can be used directly
+        filled_keypoints = keypoints.astype(KP_DTYPE, copy=False)
+        keypoint_keyframes = detected
+    else:
+        frame_offsets = frames-frames[0]
+        filled_keypoints = np.zeros(shape=(n_filled_frames, keypoints.shape[1], 3), dtype=KP_DTYPE)
+        filled_keypoints[frame_offsets] = keypoints
+        
+        keypoint_keyframes = np.zeros(shape=(n_filled_frames, keypoints.shape[1]), dtype=bool)
+        keypoint_keyframes[frame_offsets] = detected
     
     filled_tracklet = {
-        Keys.start: int(filled_frames[0]),
+        Keys.start: int(frames[0]),
         Keys.keypoints: filled_keypoints,
-        Keys.prepadding: tracklet[Keys.prepadding] if Keys.prepadding in tracklet.keys() else 0,
-        Keys.postpadding: tracklet[Keys.postpadding] if Keys.postpadding in tracklet.keys() else 0
+        Keys.prepadding: tracklet[Keys.prepadding] if Keys.prepadding in tracklet else 0,
+        Keys.postpadding: tracklet[Keys.postpadding] if Keys.postpadding in tracklet else 0
     }
     
     return filled_tracklet, keypoint_keyframes
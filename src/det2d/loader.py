@@ -2,16 +2,18 @@ from abc import ABC, abstractmethod
 from typing import override
 import os
 import datetime
-import json
 from types import FunctionType
+from collections import defaultdict
+import itertools
+import re
 import numpy as np
 
-from .read import _process_frame_detections_dict
+from .read import _parse_frame_detections, _process_frame_detections_dict
 from .keys import Keys
 from .fill import zero_tracklet_gaps
 
 class Loader(ABC):
-    def __init__(self, path: str, window_length: int=1, window_interval: int=1, keypoint_indices: dict=None):
+    def __init__(self, path: str, window_length: int=1, window_interval: int=1, keypoint_indices: dict=None, cache_lines: bool=False):
         """
         Create a (Detection- or Tracklet)Loader from the specified path, which loads a new window from a file on every call to __next__()
         
@@ -19,7 +21,8 @@ class Loader(ABC):
         - path: the path to the det2d file (.det2d.json)
         - window_length: the number of subsequent poses to return on each iteration
         - window_interval: the distance in frames between two window start frames
-        - keypoint_indices: dict of the keypoint indices to load per category; leave None to load all keypoints
+        - keypoint_indices: dict of the keypoint indices or boolean keypoint masks to load per category; leave None to load all keypoints. Categories that are not in the dict load all keypoints
+        - cache_lines: if True, keep every parsed line of the file, so that iterating over this Loader again doesn't parse the file again. The cache grows to the number of frames in the file and lives as long as the Loader
         """
         assert os.path.isfile(path), f"Given path \"{path}\" does not point to a .det2d.json file"
         assert isinstance(window_length, int), f"window_length type must be int, but was {type(window_length)}"
@@ -27,19 +30,33 @@ class Loader(ABC):
         assert isinstance(window_interval, int), f"window_interval type must be int, but was {type(window_interval)}"
         assert window_interval > 0, f"window_interval must be >0, but was {window_interval}"
         assert keypoint_indices is None or isinstance(keypoint_indices, dict), f"keypoint_indices must be None or a dict, but was a {type(keypoint_indices)}"
+        assert isinstance(cache_lines, bool), f"cache_lines type must be bool, but was {type(cache_lines)}"
         self._path = path
         self._window_length = window_length
         self._window_interval = window_interval
         self._keypoint_indices = keypoint_indices
+        self._resolved_keypoint_indices = defaultdict(lambda: slice(None)) # Resolve indices once, instead of on every pose
+        if keypoint_indices is not None:
+            for category, indices in keypoint_indices.items():
+                if not isinstance(indices, slice):
+                    indices = np.asarray(indices)
+                    indices = np.flatnonzero(indices) if indices.dtype==bool else indices.astype(np.intp) # Boolean masks select the keypoints where they are True
+                self._resolved_keypoint_indices[category] = indices
+        self._line_cache = {} if cache_lines else None # Parsed lines by their stripped bytes, if enabled
+        self._line_cache_mtime = None
         self._init_len()
     
     def __iter__(self):
         """
         Make the Loader iterable
         """
-        self._file_handle = open(self.path, 'r')
+        if self._line_cache is not None and self._line_cache_mtime != os.path.getmtime(self.path): # Parsed lines of a modified file are no longer needed
+            self._line_cache.clear()
+            self._line_cache_mtime = os.path.getmtime(self.path)
+        
+        self._file_handle = open(self.path, 'rb')
         first_line = self.file_handle.readline().strip()
-        assert first_line=='{', f".det2d.json file must start with '{{', but the first line was '{first_line}'"
+        assert first_line==b'{', f".det2d.json file must start with '{{', but the first line was '{first_line.decode()}'"
         
         self._current_window = {}
         self._current_window_start_frame = 0
@@ -70,22 +87,40 @@ class Loader(ABC):
             line = self.file_handle.readline().strip()
             self._current_window_stop_frame += 1 # Update _current_window_stop_frame, regardless of whether the window actually changes
             
-            if line in ('', '}'): # End of file reached
+            if line in (b'', b'}'): # End of file reached
                 if self.termination_frame is None: self._termination_frame = self.current_window_stop_frame
                 if len(self.current_window) == 0 and len(line) == 0:
                     self.file_handle.close()
                     raise StopIteration
                 continue
             
-            frame, detection_dicts = line.split(':', 1)
-            frame = int(frame.strip()[1:-1])
-            detection_dicts = json.loads(detection_dicts.strip().rstrip(','), object_hook=lambda dictionary: {int(key) if key.isdigit() else key: np.array(value) if isinstance(value, list | tuple) else value for key, value in dictionary.items()})
-            _process_frame_detections_dict(frame, detection_dicts)
+            frame, detection_dicts = self._parse_cached_line(line)
             if self.det2d_start_frame is None: self._det2d_start_frame = frame
             self._update_current_window(frame, detection_dicts) # Add current line to the window dict
         
         return self.current_window
     
+    def _parse_cached_line(self, line: bytes) -> tuple:
+        """
+        Parse and verify a single det2d line, or take it from the line cache if it was parsed during an earlier iteration
+        
+        Input:
+        - line: the stripped det2d line
+        
+        Output:
+        - The frame number
+        - The detections on the frame, already processed with _process_frame_detections_dict. These can be modified.
+        """
+        if self._line_cache is None: return _parse_line(line)
+        
+        if line not in self._line_cache: self._line_cache[line] = _parse_line(line)
+        frame, detection_dicts = self._line_cache[line]
+        detection_dicts = { # Copy the cached detections, so that this window can't modify them
+            category: [pose_dict | {Keys.keypoints: pose_dict[Keys.keypoints].copy()} for pose_dict in category_list]
+            for category, category_list in detection_dicts.items()
+        }
+        return frame, detection_dicts
+    
     @abstractmethod
     def _del_first_window_frames(self, n_frames: int=1):
         """
@@ -115,16 +150,13 @@ class Loader(ABC):
     
     def _init_len(self):
         """
-        Retrieve the number of frames from the file.
+        Retrieve the number of frames from the file, streaming it line by line instead of reading it into memory at once.
         """
-        self._file_handle = open(self.path, 'r')
-        lines = self.file_handle.readlines()
-        self.file_handle.close()
-        
-        while len(lines) and lines[0].strip()  in ('', '{'): lines = lines[1:]
-        while len(lines) and lines[-1].strip() in ('', '}'): lines = lines[:-1]
+        n_frames = 0
+        with open(self.path, 'rb') as file_handle:
+            for line in file_handle:
+                if line.strip() not in (b'', b'{', b'}'): n_frames += 1
         
-        n_frames = len(lines)
         n_windows = int(np.ceil(n_frames/self.window_interval))
         
         self._n_frames = n_frames
@@ -192,37 +224,43 @@ class DetectionLoader(Loader):
         """
         See Loader
         """
-        current_window_keys = list(self.current_window.keys())
-        for _ in range(n_frames):
-            if len(current_window_keys) == 0: break
-            del self._current_window[current_window_keys.pop(0)]
+        for frame in tuple(itertools.islice(self.current_window, n_frames)): # Dicts preserve insertion order, so these are the first frames
+            del self._current_window[frame]
     
     @override
     def _update_current_window(self, frame: int, detection_dicts: dict):
         """
         See Loader
         """
-        self.current_window[frame] = {
-            category: [
-                pose_dict | {Keys.keypoints: pose_dict[Keys.keypoints][self.keypoint_indices[category] if self.keypoint_indices is not None else slice(None)]}
-                for pose_dict in category_list
-            ]
-            for category, category_list in detection_dicts.items()
-        }
+        # detection_dicts was freshly parsed for this frame, so its pose dicts can be modified in place
+        for category, category_list in detection_dicts.items():
+            keypoint_indices = self._resolved_keypoint_indices[category]
+            for pose_dict in category_list:
+                pose_dict[Keys.keypoints] = pose_dict[Keys.keypoints][keypoint_indices]
+        self.current_window[frame] = detection_dicts
         
         
 class TrackletLoader(Loader):
-    def __init__(self, path: str, window_length: int=1, window_interval: int=1, keypoint_indices: dict=None, fill_function: FunctionType=zero_tracklet_gaps, confidence_threshold: float=0):
+    def __init__(self, path: str, window_length: int=1, window_interval: int=1, keypoint_indices: dict=None, fill_function: FunctionType=zero_tracklet_gaps, confidence_threshold: float=0, cache_lines: bool=False):
         """
-        Load tracklets from a file one by one
+        Load tracklets from a file one by one.
+        Tracklet keypoints in the returned window are views into buffers that are reused and shifted in place between windows, and the tracklet dicts are updated in place, so copy them if they must outlive the next call to __next__().
         
         Inputs:
         - fill_function: function from fill.py with which to fill tracklet gaps
         - confidence_threshold: keypoint confidence threshold below which to assume a keypoint to be undetected
         """
-        super().__init__(path, window_length, window_interval, keypoint_indices)
+        super().__init__(path, window_length, window_interval, keypoint_indices, cache_lines)
         self._fill_function = fill_function
         self._confidence_threshold = confidence_threshold
+    
+    @override
+    def __iter__(self):
+        """
+        See Loader
+        """
+        self._keypoint_buffers = {}
+        return super().__iter__()
         
     @override
     def _del_first_window_frames(self, n_frames: int=1):
@@ -234,21 +272,28 @@ class TrackletLoader(Loader):
         categories = tuple(self.current_window.keys())
         for category in categories:
             category_dict = self.current_window[category]
+            category_buffers = self._keypoint_buffers[category]
             ids = tuple(category_dict.keys())
             for id in ids:
                 tracklet_dict = category_dict[id]
                 n_frames_to_delete = tracklet_new_start_frame - tracklet_dict[Keys.start]
                 if n_frames_to_delete <= 0: continue
                 
-                if n_frames_to_delete >= tracklet_dict[Keys.keypoints].shape[0]:
+                n_frames_to_keep = tracklet_dict[Keys.keypoints].shape[0] - n_frames_to_delete
+                if n_frames_to_keep <= 0:
                     del category_dict[id]
+                    del category_buffers[id]
                     continue
                 
-                tracklet_dict[Keys.start] = tracklet_new_start
-                tracklet_dict[Keys.keypoints] = tracklet_dict[Keys.keypoints][n_frames_to_delete:]
+                buffer = category_buffers[id]
+                buffer[:n_frames_to_keep] = buffer[n_frames_to_delete:n_frames_to_delete+n_frames_to_keep]
+                tracklet_dict[Keys.start] = tracklet_new_start_frame
+                tracklet_dict[Keys.keypoints] = buffer[:n_frames_to_keep]
                 tracklet_dict[Keys.prepadding] = max(0, tracklet_dict[Keys.prepadding]-n_frames_to_delete)
             
-            if len(category_dict) == 0: del self.current_window[category]
+            if len(category_dict) == 0:
+                del self.current_window[category]
+                del self._keypoint_buffers[category]
     
     @override
     def _update_current_window(self, frame: int, detection_dicts: dict):
@@ -256,24 +301,90 @@ class TrackletLoader(Loader):
         See Loader
         """
         for category, pose_list in detection_dicts.items():
-            if category not in self.current_window.keys(): self.current_window[category] = {}
+            if category not in self.current_window:
+                self.current_window[category] = {}
+                self._keypoint_buffers[category] = {}
             category_dict = self.current_window[category]
+            category_buffers = self._keypoint_buffers[category]
+            keypoint_indices = self._resolved_keypoint_indices[category]
             for pose_dict in pose_list:
-                if pose_dict[Keys.id] not in category_dict.keys():
-                    category_dict[pose_dict[Keys.id]] = {
+                id = pose_dict[Keys.id]
+                pose_keypoints = pose_dict[Keys.keypoints][keypoint_indices]
+                
+                if id not in category_dict:
+                    category_buffers[id] = np.zeros(shape=(max(8, self.window_length), *pose_keypoints.shape), dtype=pose_keypoints.dtype)
+                    category_buffers[id][0] = pose_keypoints
+                    category_dict[id] = {
                         Keys.start: frame,
-                        Keys.keypoints: pose_dict[Keys.keypoints][None, self.keypoint_indices[category] if self.keypoint_indices is not None else slice(None)],
+                        Keys.keypoints: category_buffers[id][:1],
                         Keys.prepadding: 0,
                         Keys.postpadding: 0
                     }
                     continue
                 
-                tracklet_dict = category_dict[pose_dict[Keys.id]]
-                tracklet_dict[Keys.keypoints] = np.append(tracklet_dict[Keys.keypoints], pose_dict[Keys.keypoints][None, self.keypoint_indices[category] if self.keypoint_indices is not None else slice(None)], axis=0)
+                tracklet_dict = category_dict[id]
+                n_frames = tracklet_dict[Keys.keypoints].shape[0]
                 
-                if frame == tracklet_dict[Keys.start] + len(tracklet_dict[Keys.keypoints]) - 1: continue
+                if frame == tracklet_dict[Keys.start] + n_frames:
+                    buffer = self._reserve_keypoint_buffer(category, id, n_frames+1)
+                    buffer[n_frames] = pose_keypoints
+                    tracklet_dict[Keys.keypoints] = buffer[:n_frames+1]
+                    continue
                 
-                tracklet_dict[Keys.frames] = np.append(np.arange(len(tracklet_dict[Keys.keypoints])-1)+tracklet_dict[Keys.start], frame)
-                # import pdb
-                # pdb.set_trace()
-                category_dict[pose_dict[Keys.id]] = self._fill_function(tracklet_dict, self._confidence_threshold)
\ No newline at end of file
+                filled_tracklet_dict = self._fill_function({
+                    Keys.keypoints: np.append(tracklet_dict[Keys.keypoints], pose_keypoints[None], axis=0),
+                    Keys.frames: np.append(np.arange(n_frames)+tracklet_dict[Keys.start], frame),
+                    Keys.prepadding: tracklet_dict[Keys.prepadding],
+                    Keys.postpadding: tracklet_dict[Keys.postpadding]
+                }, self._confidence_threshold)
+                
+                n_filled_frames = filled_tracklet_dict[Keys.keypoints].shape[0]
+                buffer = self._reserve_keypoint_buffer(category, id, n_filled_frames)
+                buffer[:n_filled_frames] = filled_tracklet_dict[Keys.keypoints]
+                filled_tracklet_dict[Keys.keypoints] = buffer[:n_filled_frames]
+                category_dict[id] = filled_tracklet_dict
+    
+    def _reserve_keypoint_buffer(self, category: int, id: int, n_frames: int) -> np.ndarray:
+        """
+        Get the keypoint buffer of a tracklet in the current window, doubling its capacity until it fits the requested number of frames
+        
+        Inputs:
+        - category: the category of the tracklet
+        - id: the id of the tracklet
+        - n_frames: the number of frames that the buffer must be able to hold
+        
+        Outputs:
+        - The keypoint buffer, whose first frames contain the current tracklet keypoints
+        """
+        buffer = self._keypoint_buffers[category][id]
+        if n_frames <= buffer.shape[0]: return buffer
+        
+        capacity = buffer.shape[0]
+        while capacity < n_frames: capacity *= 2
+        
+        n_current_frames = self.current_window[category][id][Keys.keypoints].shape[0]
+        new_buffer = np.zeros(shape=(capacity, *buffer.shape[1:]), dtype=buffer.dtype)
+        new_buffer[:n_current_frames] = buffer[:n_current_frames]
+        self._keypoint_buffers[category][id] = new_buffer
+        return new_buffer
+
+
+_line_pattern = re.compile(rb'"(\d+)"\s*:\s*(\{.*\})\s*,?') # Matches a stripped det2d line, capturing the frame number and detections
+
+def _parse_line(line: bytes) -> tuple:
+    """
+    Parse and verify a single det2d line
+    
+    Inputs:
+    - line: the stripped det2d line
+    
+    Outputs:
+    - The frame number
+    - The detections on the frame, already processed with _process_frame_detections_dict
+    """
+    line_match = _line_pattern.fullmatch(line)
+    assert line_match is not None, f"det2d line must have the format '\"<frame>\": {{<detections>}},', but was '{line.decode()}'"
+    frame = int(line_match.group(1))
+    detection_dicts = _parse_frame_detections(line_match.group(2))
+    _process_frame_detections_dict(frame, detection_dicts)
+    return frame, detection_dicts
\ No newline at end of file
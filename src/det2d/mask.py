@@ -1,4 +1,8 @@
 import numpy as np
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 from .keys import Keys
 
 def tracklet_confidence_mask(tracklet: dict, confidence_threshold: float=0) -> np.ndarray:
@@ -13,7 +17,8 @@ def tracklet_confidence_mask(tracklet: dict, confidence_threshold: float=0) -> n
     - array which is True where keypoints satisfy the confidence threshold and False elsewhere, shape [F,K] where F is the number of frames and K the number of keypoints
     '''
     assert confidence_threshold >= 0 and confidence_threshold <= 1, f"confidence_threshold must be at least 0 and at most 1, but was {confidence_threshold}"
-    return (tracklet[Keys.keypoints][...,2] >= confidence_threshold) & (tracklet[Keys.keypoints][...,2] > 0)
+    confidences = tracklet[Keys.keypoints][...,2]
+    return confidences > 0 if confidence_threshold == 0 else confidences >= confidence_threshold # A positive threshold already implies confidence > 0
 
 def tracklet_unpadded_mask(tracklet: dict) -> np.ndarray:
     '''
@@ -40,7 +45,9 @@ def tracklet_confidence_and_unpadded_mask(tracklet: dict, confidence_threshold:
     Outputs:
     - array which is True where keypoints satisfy the confidence_threshold and weren't padded, and False elsewhere. Shape [F,K] where F is the number of frames and K the number of keypoints
     '''
-    return tracklet_confidence_mask(tracklet, confidence_threshold) & tracklet_unpadded_mask(tracklet)[:,None]
+    mask = tracklet_confidence_mask(tracklet, confidence_threshold)
+    np.logical_and(mask, tracklet_unpadded_mask(tracklet)[:,None], out=mask) # Combine in place, instead of allocating a third [F,K] array
+    return mask
 
 def stacked_tracklets_confidence_mask(stacked_tracklets: dict, confidence_threshold: float=0) -> np.ndarray:
     '''
@@ -80,4 +87,36 @@ def stacked_tracklets_confidence_and_unpadded_mask(stacked_tracklets: dict, conf
     Outputs:
     - array which is True where keypoints satisfy the confidence_threshold and weren't padded, and False elsewhere. Shape [D,F,K] where D is the number of tracklets, F is the number of frames and K the number of keypoints
     '''
-    return stacked_tracklets_confidence_mask(stacked_tracklets, confidence_threshold) & stacked_tracklets_unpadded_mask(stacked_tracklets)[:,:,None]
\ No newline at end of file
+    assert confidence_threshold >= 0 and confidence_threshold <= 1, f"confidence_threshold must be at least 0 and at most 1, but was {confidence_threshold}"
+    keypoints = stacked_tracklets[Keys.keypoints]
+    if njit is None or keypoints.dtype not in _kernel_dtypes:
+        mask = stacked_tracklets_confidence_mask(stacked_tracklets, confidence_threshold)
+        np.logical_and(mask, stacked_tracklets_unpadded_mask(stacked_tracklets)[:,:,None], out=mask)
+        return mask
+    
+    mask = np.empty(shape=keypoints.shape[:-1], dtype=bool)
+    # Compare in the keypoint dtype, like NumPy does with a Python float threshold
+    _stacked_tracklets_confidence_and_unpadded_mask_kernel(keypoints, stacked_tracklets[Keys.prepaddings], stacked_tracklets[Keys.postpaddings], keypoints.dtype.type(confidence_threshold), mask)
+    return mask
+
+_kernel_dtypes = (np.float32, np.float64) # numba doesn't support float16, and casting the threshold to an integer dtype would change the comparison
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _stacked_tracklets_confidence_and_unpadded_mask_kernel(keypoints, prepaddings, postpaddings, confidence_threshold, mask):
+        '''
+        Compute stacked_tracklets_confidence_and_unpadded_mask in a single pass, without intermediate arrays
+        
+        Inputs:
+        - keypoints: the stacked tracklet keypoints, shape [D,F,K,3]
+        - prepaddings, postpaddings: the stacked tracklet paddings, shape [D,]
+        - confidence_threshold: the confidence threshold, with the same dtype as keypoints
+        - mask: output array, shape [D,F,K]
+        '''
+        D, F, K = mask.shape
+        for d in prange(D):
+            for f in range(F):
+                unpadded = f >= prepaddings[d] and F-1-f >= postpaddings[d]
+                for k in range(K):
+                    confidence = keypoints[d,f,k,2]
+                    mask[d,f,k] = unpadded and confidence >= confidence_threshold and confidence > 0
\ No newline at end of file
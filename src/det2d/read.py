@@ -2,12 +2,18 @@ from types import FunctionType
 import os
 import json
 import numpy as np
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 from .convert import detections2tracklets
 from .fill import zero_tracklet_gaps
 from .keys import Keys
+from .dtype import KP_DTYPE
 
-def read_tracklets(path: str, fill_function: FunctionType=zero_tracklet_gaps, confidence_threshold: float=0, frame_range: range=None, verbose: bool=False) -> dict:
+def read_tracklets(path: str | bytes, fill_function: FunctionType=zero_tracklet_gaps, confidence_threshold: float=0, frame_range: range=None, verbose: bool=False) -> dict:
     '''
     Import tracklet data from a .det2d.json file.
     
@@ -31,7 +37,7 @@ def read_tracklets(path: str, fill_function: FunctionType=zero_tracklet_gaps, co
     "keypoints" contains an array of shape [F,K,3] where F is the number of frames, K is the number of keypoints, and the last axis contains x,y,confidence.
     
     Inputs:
-    - path: path to the .det2d.json file to read
+    - path: path to the .det2d.json file to read, or the contents of such a file as bytes
     - fill_function: function to use to fill gaps in the tracklet
     - confidence_threshold: keypoint confidence threshold to use in fill_function
     - frame_range: range of frames to convert to a tracklet, must have step size 1
@@ -44,7 +50,7 @@ def read_tracklets(path: str, fill_function: FunctionType=zero_tracklet_gaps, co
     tracklets = detections2tracklets(poses, fill_function, confidence_threshold, frame_range, verbose=verbose)
     return tracklets
     
-def read_detections(path: str, frame_range: range=None) -> dict:
+def read_detections(path: str | bytes, frame_range: range=None) -> dict:
     '''
     Import pose detection data from a .det2d.json file.
     
@@ -69,39 +75,156 @@ def read_detections(path: str, frame_range: range=None) -> dict:
     It contains keypoint x and y coordinates and confidence repeatedly in that order.
     
     Inputs:
-    - path: path to the .det2d.json file to read
+    - path: path to the .det2d.json file to read, or the contents of such a file as bytes
     - frame_range: range of frames to read, must have step size 1
     
     Outputs:
     - Pose data as described above.
     '''
-    assert isinstance(path, str), f"Argument 'path' must be a str, but was a {type(path)}"
-    assert os.path.isfile(path), f"Path \"{path}\" does not exist"
     assert frame_range is None or frame_range.step==1, f"frame_range must have a step size of 1, but this was {frame_range.step}"
     
-    with open(path, 'r') as file:
-        poses = json.load(file, object_hook=lambda dictionary: {int(key) if key.isdigit() else key: np.array(value) if isinstance(value, list | tuple) else value for key, value in dictionary.items()})
-    
-    if frame_range is not None: poses = {frame: poses[frame] for frame in frame_range if frame in poses.keys()}
+    parsed_poses = _load_json(path)
     
-    for frame, frame_dict in poses.items():
+    # Filter, convert and verify the frames in a single pass
+    poses = {}
+    for frame, frame_dict in parsed_poses.items():
+        frame = int(frame)
+        if frame_range is not None and frame not in frame_range: continue
+        frame_dict = _convert_frame_detections(frame_dict)
         _process_frame_detections_dict(frame, frame_dict)
-        
-        # frame_index += 1 #
+        poses[frame] = frame_dict
     
     return poses
     
+def read_detections_soa(path: str | bytes, frame_range: range=None) -> dict:
+    '''
+    Import pose detection data from a .det2d.json file, with the poses of every category stored in flat arrays.
+    
+    Pose structure:
+    {
+    <category0>: {
+        "frames": <frames0>,
+        "ids": <ids0>,
+        "keypoints": <keypoints0>
+    },
+    <category1>: ...,
+    ...
+    }
+    
+    Where each category dictionary holds the N poses of that category in file order.
+    "frames" contains an int array of shape [N,] with the frame number of every pose.
+    "ids" contains an int array of shape [N,] with the tracking identity of every pose.
+    "keypoints" contains an array of shape [N,K,3], where K is the number of keypoints and the last axis contains x,y,confidence.
+    
+    Inputs:
+    - path: path to the .det2d.json file to read, or the contents of such a file as bytes
+    - frame_range: range of frames to read, must have step size 1
+    
+    Outputs:
+    - Pose data as described above.
+    '''
+    assert frame_range is None or frame_range.step==1, f"frame_range must have a step size of 1, but this was {frame_range.step}"
+    
+    parsed_poses = _load_json(path)
+    
+    # Collect flat lists per category in a single pass, and convert them to arrays once at the end
+    category_frames, category_ids, category_keypoints = {}, {}, {}
+    for frame, frame_dict in parsed_poses.items():
+        frame = int(frame)
+        if frame_range is not None and frame not in frame_range: continue
+        for category, category_list in frame_dict.items():
+            category = int(category)
+            if category not in category_frames: category_frames[category], category_ids[category], category_keypoints[category] = [], [], []
+            for p, pose in enumerate(category_list):
+                _verify_pose(frame, category, p, pose)
+                category_frames[category].append(frame)
+                category_ids[category].append(pose[Keys.id])
+                category_keypoints[category].append(pose[Keys.keypoints])
+    
+    poses = {}
+    for category, keypoints in category_keypoints.items():
+        keypoint_lengths = {len(pose_keypoints) for pose_keypoints in keypoints}
+        assert len(keypoint_lengths)<=1, f"All poses of a category must have equally many keypoints, but category {category} has poses with {sorted(length//3 for length in keypoint_lengths)} keypoints"
+        poses[category] = {
+            Keys.frames: np.asarray(category_frames[category], dtype=int),
+            Keys.ids: np.asarray(category_ids[category], dtype=int),
+            Keys.keypoints: np.asarray(keypoints, dtype=KP_DTYPE).reshape((len(keypoints), keypoint_lengths.pop()//3 if keypoint_lengths else 0, 3))
+        }
+    
+    return poses
+    
+def _load_json(path: str | bytes) -> dict:
+    """
+    Parse a whole .det2d.json file
+    
+    Inputs:
+    - path: path to the .det2d.json file to read, or the contents of such a file as bytes
+    
+    Outputs:
+    - The parsed json dictionary, still indexed by frame number strings
+    """
+    if isinstance(path, bytes): return _json_loads(path)
+    
+    assert isinstance(path, str), f"Argument 'path' must be a str or bytes, but was a {type(path)}"
+    assert os.path.isfile(path), f"Path \"{path}\" does not exist"
+    
+    with open(path, 'rb') as file:
+        return _json_loads(file.read())
+    
 def _process_frame_detections_dict(frame: int, frame_detections_dict: str) -> dict:
     """
-    Verify a single det2d line after indexing by frame number, and reshape keypoints from [3*K] to [K,3]. Modifies the dict directly, and does not return anything.
+    Verify a single det2d line after indexing by frame number, and convert keypoints from a list of length 3*K to an array of shape [K,3]. Modifies the dict directly, and does not return anything.
     
     Inputs:
     - frame: the frame number, used in error messages
     - frame_detections_dict: loaded dictionary after indexing by frame number
     """
     for category, category_list in frame_detections_dict.items():
-        for p, pose in enumerate(category_list):
-            assert Keys.id in pose.keys(), f"Pose does not have id (frame {frame}, category {category}, pose {p})"
-            assert Keys.keypoints in pose.keys(), f"Pose does not have keypoints (frame {frame}, category {category}, id {pose[Keys.id]})"
-            assert np.isclose(len(pose[Keys.keypoints])%3, 0), f"Last axis dimension of keypoints must be divisible by 3, but was {len(pose[Keys.keypoints])} (frame {frame}, category {category}, id {pose[Keys.id]})"
-            pose[Keys.keypoints] = pose[Keys.keypoints].reshape((-1,3))
\ No newline at end of file
+        for p, pose in enumerate(category_list): _verify_pose(frame, category, p, pose)
+        
+        keypoint_lengths = {len(pose[Keys.keypoints]) for pose in category_list}
+        if len(category_list)>1 and len(keypoint_lengths)==1:
+            # Poses with equally many keypoints are converted with a single call, and become views of one [P,K,3] array
+            # np.asarray with an explicit dtype converts the parsed lists about twice as fast as filling an array.array for np.frombuffer
+            category_keypoints = np.asarray([pose[Keys.keypoints] for pose in category_list], dtype=KP_DTYPE).reshape((len(category_list), keypoint_lengths.pop()//3, 3))
+            for pose, pose_keypoints in zip(category_list, category_keypoints): pose[Keys.keypoints] = pose_keypoints
+        else:
+            for pose in category_list: pose[Keys.keypoints] = np.asarray(pose[Keys.keypoints], dtype=KP_DTYPE).reshape((-1,3))
+            
+def _verify_pose(frame: int, category: int, pose_index: int, pose: dict):
+    """
+    Verify a single parsed pose, before its keypoints are converted to an array
+    
+    Inputs:
+    - frame: the frame number, used in error messages
+    - category: the pose category, used in error messages
+    - pose_index: the index of the pose within its category on the frame, used in error messages
+    - pose: the parsed pose dictionary
+    """
+    assert Keys.id in pose, f"Pose does not have id (frame {frame}, category {category}, pose {pose_index})"
+    assert Keys.keypoints in pose, f"Pose does not have keypoints (frame {frame}, category {category}, id {pose[Keys.id]})"
+    assert len(pose[Keys.keypoints])%3==0, f"Last axis dimension of keypoints must be divisible by 3, but was {len(pose[Keys.keypoints])} (frame {frame}, category {category}, id {pose[Keys.id]})"
+
+def _parse_frame_detections(frame_detections_json: str | bytes) -> dict:
+    """
+    Parse the detections of a single det2d line after indexing by frame number. Converts category keys to int, but leaves keypoints as parsed lists.
+    
+    Inputs:
+    - frame_detections_json: json string or bytes of the detections on a single frame
+    
+    Outputs:
+    - dictionary of detections on the frame, to be processed with _process_frame_detections_dict
+    """
+    return _convert_frame_detections(_json_loads(frame_detections_json))
+
+def _convert_frame_detections(frame_detections_dict: dict) -> dict:
+    """
+    Convert the parsed json detections of a single frame, after indexing by frame number. Converts category keys to int, but leaves keypoints as parsed lists.
+    
+    Inputs:
+    - frame_detections_dict: parsed json dictionary of the detections on a single frame
+    
+    Outputs:
+    - dictionary of detections on the frame, to be processed with _process_frame_detections_dict
+    """
+    return {int(category): category_list for category, category_list in frame_detections_dict.items()}
\ No newline at end of file
@@ -1,7 +1,8 @@
 import numpy as np
-from .window import tracklet_window
 from .keys import Keys
-from .verify import assert_tracklets_comparable
+from .dtype import KP_DTYPE
+from .buffer import _get_buffer
+from .verify import assert_tracklet_valid
 
 def stack_tracklets(tracklets: dict, window: bool=False) -> (np.ndarray, np.ndarray):
     '''
@@ -17,28 +18,48 @@ def stack_tracklets(tracklets: dict, window: bool=False) -> (np.ndarray, np.ndar
         - start: the start frame
         - keypoints: the keypoints of the tracklets where the first dimension concatenates the tracklets, shape [D,F,K,3] where D is the number of IDs
     '''
-    start = tuple(tracklets.values())[0][Keys.start] if len(tracklets) else 0
-    stop = start+tuple(tracklets.values())[0][Keys.keypoints].shape[0] if len(tracklets) else 0
+    if not tracklets:
+        return {
+            Keys.ids: np.empty(shape=(0,), dtype=int),
+            Keys.start: 0,
+            Keys.keypoints: np.empty(shape=(0, 0, 0, 3), dtype=KP_DTYPE),
+            Keys.prepaddings: np.empty(shape=(0,), dtype=int),
+            Keys.postpaddings: np.empty(shape=(0,), dtype=int)
+        }
     
-    for tracklet in tuple(tracklets.values())[1:]:
+    tracklets_iterator = iter(tracklets.values())
+    first_tracklet = next(tracklets_iterator)
+    start = first_tracklet[Keys.start]
+    stop = start+first_tracklet[Keys.keypoints].shape[0]
+    keypoint_shape = first_tracklet[Keys.keypoints].shape[1:]
+    
+    assert_tracklet_valid(first_tracklet)
+    for tracklet in tracklets_iterator:
         if window:
+            assert_tracklet_valid(tracklet)
             start = min(start, tracklet[Keys.start])
             stop  = max(stop, tracklet[Keys.start]+tracklet[Keys.keypoints].shape[0])
         else:
-            assert_tracklets_comparable(tracklet, tuple(tracklets.values())[0])
+            # The first tracklet was validated already, so only validate this one and compare it to the first
+            assert_tracklet_valid(tracklet)
+            assert tracklet[Keys.keypoints].shape==first_tracklet[Keys.keypoints].shape, f"tracklets must span equally many frames and have equally many keypoints to be stacked without windowing, but span {first_tracklet[Keys.keypoints].shape[0]} and {tracklet[Keys.keypoints].shape[0]} frames and have {first_tracklet[Keys.keypoints].shape[1]} and {tracklet[Keys.keypoints].shape[1]} keypoints"
+            assert tracklet[Keys.start]==start, f"tracklets must start on the same frame to be stacked without windowing, but start on {start} and {tracklet[Keys.start]}"
 
     stacked_tracklets = {
         Keys.ids: np.zeros(shape=len(tracklets), dtype=int),
         Keys.start: start,
-        Keys.keypoints: np.zeros(shape=(len(tracklets), stop-start, *tuple(tracklets.values())[0][Keys.keypoints].shape[1:]), dtype=float),
+        Keys.keypoints: _get_buffer(shape=(len(tracklets), stop-start, *keypoint_shape), dtype=KP_DTYPE),
         Keys.prepaddings: np.zeros(shape=(len(tracklets),), dtype=int),
         Keys.postpaddings: np.zeros(shape=(len(tracklets),), dtype=int)
     }
     
+    # Copy each tracklet straight into its frame range of the stack, the rest stays zero
     for tracklet_index, (tracklet_id, tracklet) in enumerate(tracklets.items()):
+        prepadding = tracklet[Keys.start]-start
+        n_frames = tracklet[Keys.keypoints].shape[0]
         stacked_tracklets[Keys.ids][tracklet_index] = tracklet_id
-        stacked_tracklets[Keys.keypoints][tracklet_index] = tracklet_window(tracklet, start, stop-start)[Keys.keypoints]
-        stacked_tracklets[Keys.prepaddings][tracklet_index] = tracklet[Keys.start]-stacked_tracklets[Keys.start]
-        stacked_tracklets[Keys.postpaddings][tracklet_index] = stop-(tracklet[Keys.start]+tracklet[Keys.keypoints].shape[0])
+        stacked_tracklets[Keys.keypoints][tracklet_index, prepadding:prepadding+n_frames] = tracklet[Keys.keypoints]
+        stacked_tracklets[Keys.prepaddings][tracklet_index] = prepadding
+        stacked_tracklets[Keys.postpaddings][tracklet_index] = stop-(tracklet[Keys.start]+n_frames)
     
     return stacked_tracklets
\ No newline at end of file
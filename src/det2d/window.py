@@ -1,6 +1,11 @@
 import numpy as np
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 from .verify import assert_tracklet_valid
 from .keys import Keys
+from .buffer import _get_buffer
 
 def tracklet_window(tracklet: dict, window_start: int, window_length: int) -> dict:
     '''
@@ -14,21 +19,8 @@ def tracklet_window(tracklet: dict, window_start: int, window_length: int) -> di
     Outputs:
     - The windowed tracklet. The 'prepadding' and 'postpadding' keys show how many frames were zeropadded before- and after the original keypoints
     '''
-    window_frames_before_tracklet, _, gap_frames_at_tracklet_start, window_frames_in_tracklet, gap_frames_at_tracklet_end, _, window_frames_after_tracklet = tracklet_window_overlap(tracklet, window_start, window_length)
-    
-    windowed_tracklet = {
-        Keys.start: window_start,
-        Keys.keypoints: np.zeros(shape=(window_length, *tracklet[Keys.keypoints].shape[1:]), dtype=float),
-        Keys.prepadding:  max(0, tracklet[Keys.prepadding]+window_frames_before_tracklet-gap_frames_at_tracklet_start),
-        Keys.postpadding: max(0, tracklet[Keys.postpadding]+window_frames_after_tracklet-gap_frames_at_tracklet_end)
-    }
-    
-    if window_frames_in_tracklet==0: return windowed_tracklet
-    
-    windowed_tracklet[Keys.keypoints][window_frames_before_tracklet:window_length-window_frames_after_tracklet] = \
-                tracklet[Keys.keypoints][gap_frames_at_tracklet_start:gap_frames_at_tracklet_start+window_frames_in_tracklet]
-    
-    return windowed_tracklet
+    windowed_keypoints = _get_buffer(shape=(window_length, *tracklet[Keys.keypoints].shape[1:]), dtype=tracklet[Keys.keypoints].dtype, zero=False)
+    return _window_into(tracklet, window_start, window_length, windowed_keypoints)
 
 def tracklets_window(tracklets: dict, window_start: int, window_length: int) -> dict:
     """
@@ -43,10 +35,15 @@ def tracklets_window(tracklets: dict, window_start: int, window_length: int) ->
     - The windowed tracklets, each of which with added 'prepadding' and 'postpadding' keys which show how many frames were zeropadded before- and after the original keypoints
     """
     windowed_tracklets = {}
-    for category in tracklets.keys():
-        windowed_tracklets[category] = {}
-        for id in tracklets[category].keys():
-            windowed_tracklets[category][id] = tracklet_window(tracklets[category][id], window_start, window_length)
+    for category, category_tracklets in tracklets.items():
+        keypoint_shapes = {tracklet[Keys.keypoints].shape[1:] for tracklet in category_tracklets.values()}
+        if len(keypoint_shapes)!=1:
+            windowed_tracklets[category] = {id: tracklet_window(tracklet, window_start, window_length) for id, tracklet in category_tracklets.items()}
+            continue
+        
+        # Window all tracklets of the category into a single [D,F,K,3] buffer, and hand out a view per tracklet
+        windowed_keypoints = np.zeros(shape=(len(category_tracklets), window_length, *keypoint_shapes.pop()), dtype=np.result_type(*(tracklet[Keys.keypoints] for tracklet in category_tracklets.values())))
+        windowed_tracklets[category] = {id: _window_into(tracklet, window_start, window_length, windowed_keypoints[tracklet_index], zero_padding=False) for tracklet_index, (id, tracklet) in enumerate(category_tracklets.items())}
     
     return windowed_tracklets
 
@@ -62,18 +59,23 @@ def stacked_tracklets_window(stacked_tracklets: dict, window_start: int, window_
     Outputs:
     - The windowed stacked tracklets
     '''
-    window_frames_before_tracklets, _, gap_frames_at_tracklets_start, window_frames_in_tracklets, gap_frames_at_tracklets_end, _, window_frames_after_tracklets = tracklet_window_overlap({
-        Keys.start: stacked_tracklets[Keys.start],
-        Keys.keypoints: np.zeros(shape=stacked_tracklets[Keys.keypoints].shape[1:], dtype=float),
-        Keys.prepadding: int(min(stacked_tracklets[Keys.prepaddings])) if len(stacked_tracklets[Keys.prepaddings]) else 0,
-        Keys.postpadding: int(min(stacked_tracklets[Keys.postpaddings])) if len(stacked_tracklets[Keys.postpaddings]) else 0
-    }, window_start, window_length)
+    n_tracklets, n_frames, *keypoint_shape = stacked_tracklets[Keys.keypoints].shape
+    window_frames_before_tracklets, _, gap_frames_at_tracklets_start, window_frames_in_tracklets, gap_frames_at_tracklets_end, _, window_frames_after_tracklets = \
+            _overlap(stacked_tracklets[Keys.start], n_frames, window_start, window_length)
+    
+    # The padding changes are shared by all tracklets, so shift copies of the padding arrays by a scalar and clip them in place
+    prepaddings = stacked_tracklets[Keys.prepaddings].astype(int, copy=True)
+    prepaddings += window_frames_before_tracklets-gap_frames_at_tracklets_start
+    np.clip(prepaddings, 0, None, out=prepaddings)
+    postpaddings = stacked_tracklets[Keys.postpaddings].astype(int, copy=True)
+    postpaddings += window_frames_after_tracklets-gap_frames_at_tracklets_end
+    np.clip(postpaddings, 0, None, out=postpaddings)
     
     windowed_stacked_tracklets = {
         Keys.start: window_start,
-        Keys.keypoints: np.zeros(shape=(stacked_tracklets[Keys.keypoints].shape[0], window_length, *stacked_tracklets[Keys.keypoints].shape[2:]), dtype=float),
-        Keys.prepaddings:  np.maximum(0, stacked_tracklets[Keys.prepaddings]+window_frames_before_tracklets-gap_frames_at_tracklets_start),
-        Keys.postpaddings: np.maximum(0, stacked_tracklets[Keys.postpaddings]+window_frames_after_tracklets-gap_frames_at_tracklets_end)
+        Keys.keypoints: _get_buffer(shape=(n_tracklets, window_length, *keypoint_shape), dtype=stacked_tracklets[Keys.keypoints].dtype),
+        Keys.prepaddings:  prepaddings,
+        Keys.postpaddings: postpaddings
     }
     
     if window_frames_in_tracklets==0: return windowed_stacked_tracklets
@@ -101,12 +103,60 @@ def tracklet_window_overlap(tracklet: dict, window_start: int, window_length: in
     - Number of frames in the window after the tracklet ends
     '''
     assert_tracklet_valid(tracklet)
-    assert window_length>0, f"window_length must be greater than 0, but was {window_length}"
+    return _overlap(tracklet[Keys.start], tracklet[Keys.keypoints].shape[0], window_start, window_length)
+
+def _window_into(tracklet: dict, window_start: int, window_length: int, windowed_keypoints: np.ndarray, zero_padding: bool=True) -> dict:
+    '''
+    Apply windowing to a tracklet, writing the windowed keypoints into a given buffer
     
-    window_stop = window_start+window_length
+    Inputs:
+    - tracklet: tracklet to window
+    - window_start: window start frame
+    - window_length: window number of frames
+    - windowed_keypoints: buffer of shape [window_length,K,3] to write the windowed keypoints to
+    - zero_padding: whether to fill the frames outside the tracklet with zeros. Can be False if the buffer was already zeroed
+    
+    Outputs:
+    - The windowed tracklet, with windowed_keypoints as its keypoints
+    '''
+    window_frames_before_tracklet, _, gap_frames_at_tracklet_start, window_frames_in_tracklet, gap_frames_at_tracklet_end, _, window_frames_after_tracklet = tracklet_window_overlap(tracklet, window_start, window_length)
     
-    tracklet_start = tracklet[Keys.start]
-    tracklet_length = tracklet[Keys.keypoints].shape[0]
+    if zero_padding: # Only the frames outside the tracklet need zeroing, the copy overwrites the rest
+        windowed_keypoints[:window_frames_before_tracklet] = 0
+        windowed_keypoints[window_length-window_frames_after_tracklet:] = 0
+    windowed_keypoints[window_frames_before_tracklet:window_length-window_frames_after_tracklet] = \
+                tracklet[Keys.keypoints][gap_frames_at_tracklet_start:gap_frames_at_tracklet_start+window_frames_in_tracklet]
+    
+    windowed_tracklet = {
+        Keys.start: window_start,
+        Keys.keypoints: windowed_keypoints,
+        Keys.prepadding:  max(0, tracklet[Keys.prepadding]+window_frames_before_tracklet-gap_frames_at_tracklet_start),
+        Keys.postpadding: max(0, tracklet[Keys.postpadding]+window_frames_after_tracklet-gap_frames_at_tracklet_end)
+    }
+    
+    return windowed_tracklet
+
+def _overlap(tracklet_start: int, tracklet_length: int, window_start: int, window_length: int) -> tuple:
+    '''
+    Calculate the overlap values of tracklet_window_overlap from the tracklet frame range directly
+    
+    Inputs:
+    - tracklet_start: tracklet start frame
+    - tracklet_length: tracklet number of frames
+    - window_start: window start frame
+    - window_length: window number of frames
+    
+    Outputs:
+    - The same values as tracklet_window_overlap
+    '''
+    assert window_length>0, f"window_length must be greater than 0, but was {window_length}"
+    return _overlap_kernel(tracklet_start, tracklet_length, window_start, window_length)
+
+def _overlap_kernel(tracklet_start: int, tracklet_length: int, window_start: int, window_length: int) -> tuple:
+    '''
+    The integer arithmetic of _overlap, compiled with numba if it is installed
+    '''
+    window_stop = window_start+window_length
     tracklet_stop = tracklet_start+tracklet_length
     
     window_frames_before_tracklet     = min(window_length, max(0, tracklet_start-window_start))
@@ -119,4 +169,6 @@ def tracklet_window_overlap(tracklet: dict, window_start: int, window_length: in
     window_frames_in_tracklet    = window_length-window_frames_before_tracklet-window_frames_after_tracklet
     gap_frames_at_tracklet_end   = min(tracklet_length, max(0, tracklet_stop-window_stop))
     
-    return window_frames_before_tracklet, gap_frames_before_tracklet, gap_frames_at_tracklet_start, window_frames_in_tracklet, gap_frames_at_tracklet_end, gap_frames_after_tracklet, window_frames_after_tracklet
\ No newline at end of file
+    return window_frames_before_tracklet, gap_frames_before_tracklet, gap_frames_at_tracklet_start, window_frames_in_tracklet, gap_frames_at_tracklet_end, gap_frames_after_tracklet, window_frames_after_tracklet
+
+if njit is not None: _overlap_kernel = njit(cache=True)(_overlap_kernel)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import sys
+sys.path.append('src')
+import pytest
+
+import det2d
+
+@pytest.fixture(scope="session")
+def categories_path():
+    return "./cats.json"
+
+@pytest.fixture(scope="session")
+def keypoints_path():
+    return "./testing/20240716-150900_20240716-163915_test.det2d.json"
+
+@pytest.fixture(scope="session")
+def keypoints_blob(keypoints_path):
+    with open(keypoints_path, 'rb') as file:
+        return file.read()
+
+@pytest.fixture(scope="session")
+def categories(categories_path):
+    return det2d.read_categories(categories_path)
+
+@pytest.fixture(scope="session")
+def raw_detections(keypoints_blob):
+    return det2d.read_detections(keypoints_blob)
+
+@pytest.fixture(scope="session")
+def raw_tracklets(keypoints_blob):
+    return det2d.read_tracklets(keypoints_blob)
+
+@pytest.fixture(scope="session")
+def loader_windows():
+    def copy_windows(loader):
+        # Loaders update their window in place, so copy every window, including the tracklet dicts and keypoint buffers
+        if isinstance(loader, det2d.DetectionLoader): return [dict(detections) for detections in loader]
+        return [{category: {id: {**tracklet, det2d.Keys.keypoints: tracklet[det2d.Keys.keypoints].copy()} for id, tracklet in category_dict.items()} for category, category_dict in tracklets.items()} for tracklets in loader]
+    return copy_windows
+
+@pytest.fixture(scope="session")
+def detection_loader_windows(keypoints_path, loader_windows):
+    return loader_windows(det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2))
+
+@pytest.fixture(scope="session")
+def tracklet_loader_windows(keypoints_path, loader_windows):
+    return loader_windows(det2d.TrackletLoader(keypoints_path, window_length=2, window_interval=2))
\ No newline at end of file
@@ -1,105 +1,145 @@
-import sys
-sys.path.append('src')
 import datetime
 import numpy as np
+import pytest
 
 import det2d
 
-categories_path = "./cats.json"
-keypoints_path = "./testing/20240716-150900_20240716-163915_test.det2d.json"
+_EXPECTED_FILL_ID0 = np.asarray([
+    [[0,0,1.0],     [1,1,1.0], [2,2,1.0]],
+    [[1.5,1.5,1.0], [1,1,1.0], [1.5,1.5,1.0]],
+    [[3,3,1.0],     [1,1,1.0], [1,1,1.0]],
+    [[0,0,1.0],     [1,1,1.0], [0.5,0.5,1.0]],
+    [[0,0,0.0],     [2,2,1.0], [0,0,1.0]]
+], dtype=np.float64)
 
-def test_categories():
-    categories = det2d.read_categories(categories_path)
+_EXPECTED_FILL_ID1 = np.asarray([
+    [[0,3,1],   [1,2,1],    [2,1,1]],
+    [[1,2,0.7], [2,3,0.8],  [1,2,0.6]],
+    [[2,1,0.8], [3,4,0.75], [1,2,0.6]],
+    [[3,0,0.9], [4,5,0.7],  [1,2,0.6]]
+], dtype=np.float64)
+
+_EXPECTED_FILL_ID2 = np.asarray([
+    [[5,5,1], [6,6,1], [7,7,1]],
+    [[0,0,0], [0,0,0], [10,10,1]]
+], dtype=np.float64)
+
+_EXPECTED_MASK_ID0 = np.asarray([
+    [True, True, True],
+    [False, False, False],
+    [True, False, False],
+    [True, True, False],
+    [False, True, True]
+], dtype=bool)
+
+_EXPECTED_MASK_INTERP_ID0 = np.asarray([
+    [True, True, True],
+    [True, True, True],
+    [True, True, True],
+    [True, True, True],
+    [False, True, True]
+], dtype=bool)
+
+_EXPECTED_MASK_WINDOWED_ID0 = np.asarray([
+    [False, False, False],
+    [False, False, False],
+    [True, True, True],
+    [False, False, False],
+    [True, False, False],
+    [True, True, False],
+    [False, True, True],
+    [False, False, False]
+], dtype=bool)
+
+_EXPECTED_UNPADDED_MASK_WINDOWED_ID0 = np.asarray([False, False, True, True, True, True, True, False], dtype=bool)
+
+def test_categories(categories_path, categories):
     assert 'Human' in categories.__dir__(), "'Human' not present in categories"
     assert categories.Human==0, "Category indices incorrect"
     
     keypoints = det2d.read_category_keypoints(categories_path, categories.Human)
     assert keypoints.nose==0 and keypoints.rankle==16, "Keypoint indices incorrect"
+    assert det2d.read_categories(categories_path) is categories and det2d.read_category_keypoints(categories_path, categories.Human) is keypoints, "Category namespaces are not reused between calls"
     
     category_details = det2d.read_category_details(categories_path)
 
-def test_read():
-    categories = det2d.read_categories(categories_path)
-    
-    detections = det2d.read_detections(keypoints_path)
-    tracklets  = det2d.read_tracklets(keypoints_path)
-    
-    assert set(tracklets.keys())=={categories.Human,}, f"Tracklet categories read incorrectly; should be ({categories.Human},), but was {tuple(tracklets.keys())}"
-    assert set(tracklets[categories.Human].keys())=={0,1,2}, f"Tracklet ids read incorrectly; should be (0,1,2), but was {tuple(tracklets[categories.Human].keys())}"
-    for tracklet in tracklets[categories.Human].values(): assert set(tracklet.keys())=={det2d.Keys.start, det2d.Keys.keypoints, det2d.Keys.prepadding, det2d.Keys.postpadding}, f"Tracklet keys read incorrectly; should be (det2d.Keys.start, det2d.Keys.keypoints, det2d.Keys.keyframes), but was {tuple(tracklet.keys())}"
-    assert tracklets[categories.Human][0][det2d.Keys.keypoints].shape==(5,3,3), f"Tracklet with id 0 should have keypoints of shape (5,3,3), but this was {tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
-    assert tracklets[categories.Human][1][det2d.Keys.keypoints].shape==(4,3,3), f"Tracklet with id 1 should have keypoints of shape (4,3,3), but this was {tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
-    assert tracklets[categories.Human][2][det2d.Keys.keypoints].shape==(2,3,3), f"Tracklet with id 2 should have keypoints of shape (2,3,3), but this was {tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
-    
-    det2d.assert_tracklet_valid(tracklets[categories.Human][0])
-    det2d.assert_tracklet_valid(tracklets[categories.Human][1])
-    det2d.assert_tracklet_valid(tracklets[categories.Human][2])
-    
-    detections = det2d.read_detections(keypoints_path, range(11,14))
+def test_read(categories, raw_detections, raw_tracklets):
+    assert set(raw_tracklets.keys())=={categories.Human,}, f"Tracklet categories read incorrectly; should be ({categories.Human},), but was {tuple(raw_tracklets.keys())}"
+    assert set(raw_tracklets[categories.Human].keys())=={0,1,2}, f"Tracklet ids read incorrectly; should be (0,1,2), but was {tuple(raw_tracklets[categories.Human].keys())}"
+    for tracklet in raw_tracklets[categories.Human].values(): assert set(tracklet.keys())=={det2d.Keys.start, det2d.Keys.keypoints, det2d.Keys.prepadding, det2d.Keys.postpadding}, f"Tracklet keys read incorrectly; should be (det2d.Keys.start, det2d.Keys.keypoints, det2d.Keys.keyframes), but was {tuple(tracklet.keys())}"
+    assert raw_tracklets[categories.Human][0][det2d.Keys.keypoints].shape==(5,3,3), f"Tracklet with id 0 should have keypoints of shape (5,3,3), but this was {raw_tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
+    assert raw_tracklets[categories.Human][1][det2d.Keys.keypoints].shape==(4,3,3), f"Tracklet with id 1 should have keypoints of shape (4,3,3), but this was {raw_tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
+    assert raw_tracklets[categories.Human][2][det2d.Keys.keypoints].shape==(2,3,3), f"Tracklet with id 2 should have keypoints of shape (2,3,3), but this was {raw_tracklets[categories.Human][0][det2d.Keys.keypoints].shape}"
+    
+    det2d.assert_tracklet_valid(raw_tracklets[categories.Human][0])
+    det2d.assert_tracklet_valid(raw_tracklets[categories.Human][1])
+    det2d.assert_tracklet_valid(raw_tracklets[categories.Human][2])
+    
+    detections = {frame: raw_detections[frame] for frame in range(11,14) if frame in raw_detections}
+    assert {pose[det2d.Keys.id] for pose in detections[11][categories.Human]}=={0,1}, f"Wrong detections read on frame 11"
+    assert {pose[det2d.Keys.id] for pose in detections[12][categories.Human]}=={0,2}, f"Wrong detections read on frame 12"
+    assert {pose[det2d.Keys.id] for pose in detections[13][categories.Human]}=={0,1,2}, f"Wrong detections read on frame 13"
+
+def test_read_range(raw_detections, keypoints_blob):
+    detections = det2d.read_detections(keypoints_blob, range(11,14))
     assert set(detections.keys())==set(range(11,14)), f"Detections were read outside specified frame range"
-    assert set([pose[det2d.Keys.id] for pose in detections[11][categories.Human]])=={0,1}, f"Wrong detections read on frame 11"
-    assert set([pose[det2d.Keys.id] for pose in detections[12][categories.Human]])=={0,2}, f"Wrong detections read on frame 12"
-    assert set([pose[det2d.Keys.id] for pose in detections[13][categories.Human]])=={0,1,2}, f"Wrong detections read on frame 13"
+    for frame, frame_dict in detections.items():
+        for category, poses in frame_dict.items():
+            assert [pose[det2d.Keys.id] for pose in poses]==[pose[det2d.Keys.id] for pose in raw_detections[frame][category]], f"Ranged detections on frame {frame} don't match the full read"
 
-def test_convert():
-    categories = det2d.read_categories(categories_path)
-    
-    detections = det2d.read_detections(keypoints_path)
-    tracklets  = det2d.read_tracklets(keypoints_path)
-    
-    converted_tracklets = det2d.detections2tracklets(det2d.tracklets2detections(tracklets))
-    for category_tracklets, category_converted_tracklets in zip(tracklets.values(), converted_tracklets.values()):
+def test_read_soa(categories, raw_detections, keypoints_blob):
+    soa_detections = det2d.read_detections_soa(keypoints_blob)
+    
+    assert set(soa_detections.keys())=={categories.Human,}, f"SoA detection categories read incorrectly; should be ({categories.Human},), but was {tuple(soa_detections.keys())}"
+    human_detections = soa_detections[categories.Human]
+    poses = [(frame, pose) for frame, frame_dict in raw_detections.items() for pose in frame_dict[categories.Human]]
+    assert human_detections[det2d.Keys.keypoints].shape==(len(poses),3,3), f"SoA detection keypoints should have shape ({len(poses)},3,3), but this was {human_detections[det2d.Keys.keypoints].shape}"
+    np.testing.assert_array_equal(human_detections[det2d.Keys.frames], [frame for frame, _ in poses], err_msg=f"SoA detection frames don't match read_detections")
+    np.testing.assert_array_equal(human_detections[det2d.Keys.ids], [pose[det2d.Keys.id] for _, pose in poses], err_msg=f"SoA detection ids don't match read_detections")
+    np.testing.assert_array_equal(human_detections[det2d.Keys.keypoints], np.stack([pose[det2d.Keys.keypoints] for _, pose in poses]), err_msg=f"SoA detection keypoints don't match read_detections")
+    
+    soa_detections = det2d.read_detections_soa(keypoints_blob, range(11,14))
+    assert set(soa_detections[categories.Human][det2d.Keys.frames])==set(range(11,14)), f"SoA detections were read outside specified frame range"
+
+def test_convert(categories, raw_detections, raw_tracklets):
+    Keys = det2d.Keys # Local alias for the lookups in the loops below
+    converted_tracklets = det2d.detections2tracklets(det2d.tracklets2detections(raw_tracklets))
+    for category_tracklets, category_converted_tracklets in zip(raw_tracklets.values(), converted_tracklets.values()):
         for tracklet_id in category_tracklets.keys():
             assert tracklet_id in category_converted_tracklets.keys(), f"Tracklet ID {tracklet_id} disappeared during conversion"
             tracklet = category_tracklets[tracklet_id]
             converted_tracklet = category_converted_tracklets[tracklet_id]
-            assert np.all(tracklet[det2d.Keys.keypoints]==converted_tracklet[det2d.Keys.keypoints]) and \
-                tracklet[det2d.Keys.start]==converted_tracklet[det2d.Keys.start] and \
-                tracklet[det2d.Keys.prepadding]==converted_tracklet[det2d.Keys.prepadding] and \
-                tracklet[det2d.Keys.postpadding]==converted_tracklet[det2d.Keys.postpadding], "detections2tracklets and tracklets2detections are not each other's inverse"
-    
-    ranged_tracklets = det2d.detections2tracklets(detections, frame_range=range(12,14))
-    for tracklet_id in tracklets[categories.Human].keys():
-        tracklet = tracklets[categories.Human][tracklet_id]
+            np.testing.assert_array_equal(tracklet[Keys.keypoints], converted_tracklet[Keys.keypoints], err_msg="detections2tracklets and tracklets2detections are not each other's inverse")
+            assert tracklet[Keys.start]==converted_tracklet[Keys.start] and \
+                tracklet[Keys.prepadding]==converted_tracklet[Keys.prepadding] and \
+                tracklet[Keys.postpadding]==converted_tracklet[Keys.postpadding], "detections2tracklets and tracklets2detections are not each other's inverse"
+    
+    ranged_tracklets = det2d.detections2tracklets(raw_detections, frame_range=range(12,14))
+    for tracklet_id in raw_tracklets[categories.Human].keys():
+        tracklet = raw_tracklets[categories.Human][tracklet_id]
         ranged_tracklet = ranged_tracklets[categories.Human][tracklet_id]
-        assert ranged_tracklet[det2d.Keys.start] >= 12, f"Ranged tracklet {tracklet_id} starts before range start"
-        assert ranged_tracklet[det2d.Keys.start] + ranged_tracklet[det2d.Keys.keypoints].shape[0] <= 14, f"Ranged tracklet {tracklet_id} stops after range stop"
-        assert np.all(ranged_tracklet[det2d.Keys.keypoints]==tracklet[det2d.Keys.keypoints][ranged_tracklet[det2d.Keys.start]-tracklet[det2d.Keys.start]:ranged_tracklet[det2d.Keys.start]+ranged_tracklet[det2d.Keys.keypoints].shape[0]-tracklet[det2d.Keys.start]]), "Ranged tracklet keypoints don't match original tracklet keypoints"
-    
-def test_fill():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    
-    interpolated_tracklets = det2d.interpolate_tracklets_gaps(tracklets, confidence_threshold=0.5)
-    assert np.all(np.isclose(interpolated_tracklets[categories.Human][0][det2d.Keys.keypoints], [
-        [[0,0,1.0],     [1,1,1.0], [2,2,1.0]],
-        [[1.5,1.5,1.0], [1,1,1.0], [1.5,1.5,1.0]],
-        [[3,3,1.0],     [1,1,1.0], [1,1,1.0]],
-        [[0,0,1.0],     [1,1,1.0], [0.5,0.5,1.0]],
-        [[0,0,0.0],     [2,2,1.0], [0,0,1.0]]
-    ])), f"Tracklet with id 0 was not interpolated correctly (keypoints)"
-    
-    assert np.all(np.isclose(interpolated_tracklets[categories.Human][1][det2d.Keys.keypoints], [
-        [[0,3,1],   [1,2,1],    [2,1,1]],
-        [[1,2,0.7], [2,3,0.8],  [1,2,0.6]],
-        [[2,1,0.8], [3,4,0.75], [1,2,0.6]],
-        [[3,0,0.9], [4,5,0.7],  [1,2,0.6]]
-    ])), f"Tracklet with id 1 was not interpolated correctly (keypoints)"
-    
-    assert np.all(np.isclose(interpolated_tracklets[categories.Human][2][det2d.Keys.keypoints], [
-        [[5,5,1], [6,6,1], [7,7,1]],
-        [[0,0,0], [0,0,0], [10,10,1]]
-    ])), f"Tracklet with id 2 was not interpolated correctly (keypoints)"
+        assert ranged_tracklet[Keys.start] >= 12, f"Ranged tracklet {tracklet_id} starts before range start"
+        assert ranged_tracklet[Keys.start] + ranged_tracklet[Keys.keypoints].shape[0] <= 14, f"Ranged tracklet {tracklet_id} stops after range stop"
+        np.testing.assert_array_equal(ranged_tracklet[Keys.keypoints], tracklet[Keys.keypoints][ranged_tracklet[Keys.start]-tracklet[Keys.start]:ranged_tracklet[Keys.start]+ranged_tracklet[Keys.keypoints].shape[0]-tracklet[Keys.start]], err_msg="Ranged tracklet keypoints don't match original tracklet keypoints")
+    
+def test_fill(categories, raw_tracklets):
+    interpolated_tracklets = det2d.interpolate_tracklets_gaps(raw_tracklets, confidence_threshold=0.5)
+    np.testing.assert_allclose(interpolated_tracklets[categories.Human][0][det2d.Keys.keypoints], _EXPECTED_FILL_ID0, rtol=1e-5, atol=1e-8, err_msg=f"Tracklet with id 0 was not interpolated correctly (keypoints)")
+    np.testing.assert_allclose(interpolated_tracklets[categories.Human][1][det2d.Keys.keypoints], _EXPECTED_FILL_ID1, rtol=1e-5, atol=1e-8, err_msg=f"Tracklet with id 1 was not interpolated correctly (keypoints)")
+    np.testing.assert_allclose(interpolated_tracklets[categories.Human][2][det2d.Keys.keypoints], _EXPECTED_FILL_ID2, rtol=1e-5, atol=1e-8, err_msg=f"Tracklet with id 2 was not interpolated correctly (keypoints)")
 
-def test_window():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    
-    windowed_tracklet = det2d.tracklet_window(tracklets[categories.Human][2], window_start=10, window_length=5)
+def test_fill_low_confidence():
+    # Frame 1 has a low-confidence keypoint and frame 2 is missing, so both are interpolated between frames 0 and 3, instead of from the zeroed keypoint on frame 1
+    det2d_blob = b'{\n\t"0":{"0":[{"keypoints":[0,0,1.0],"id": 0}]},\n\t"1":{"0":[{"keypoints":[5,5,0.1],"id": 0}]},\n\t"3":{"0":[{"keypoints":[3,6,1.0],"id": 0}]}\n}'
+    interpolated_tracklet = det2d.read_tracklets(det2d_blob, fill_function=det2d.interpolate_tracklet_gaps, confidence_threshold=0.5)[0][0]
+    np.testing.assert_allclose(interpolated_tracklet[det2d.Keys.keypoints], [[[0,0,1.0]], [[1,2,1.0]], [[2,4,1.0]], [[3,6,1.0]]], rtol=1e-5, atol=1e-8, err_msg=f"Low-confidence keypoints and missing frames were not interpolated between the detected keyframes")
+
+def test_window(categories, raw_tracklets):
+    windowed_tracklet = det2d.tracklet_window(raw_tracklets[categories.Human][2], window_start=10, window_length=5)
     assert windowed_tracklet[det2d.Keys.start]==10, f"Windowed tracklet start frame should be 10, but was {windowed_tracklet[det2d.Keys.start]}"
     assert windowed_tracklet[det2d.Keys.keypoints].shape==(5,3,3), f"Windowed tracklet keypoints should have shape (5,3,3), but this was {windowed_tracklet[det2d.Keys.keypoints].shape}"
-    assert np.all(windowed_tracklet[det2d.Keys.keypoints][0:2,:,:]==0), f"Windowed tracklet start should be filled with zeroes, but wasn't"
-    assert np.all(windowed_tracklet[det2d.Keys.keypoints][4,:,:]==0), f"Windowed tracklet end should be filled with zeroes, but wasn't"
+    np.testing.assert_array_equal(windowed_tracklet[det2d.Keys.keypoints][0:2,:,:], 0, err_msg=f"Windowed tracklet start should be filled with zeroes, but wasn't")
+    np.testing.assert_array_equal(windowed_tracklet[det2d.Keys.keypoints][4,:,:], 0, err_msg=f"Windowed tracklet end should be filled with zeroes, but wasn't")
     assert windowed_tracklet[det2d.Keys.prepadding]==2, f"Windowed tracklet should have prepadding value 2, but this was {windowed_tracklet[det2d.Keys.prepadding]}"
     assert windowed_tracklet[det2d.Keys.postpadding]==1, f"Windowed tracklet should have postpadding value 1, but this was {windowed_tracklet[det2d.Keys.postpadding]}"
     
@@ -107,167 +147,191 @@ def test_window():
     assert windowed_windowed_tracklet[det2d.Keys.prepadding]==3, f"Windowed windowed tracklet should have prepadding value 3, but this was {windowed_windowed_tracklet[det2d.Keys.prepadding]}"
     assert windowed_windowed_tracklet[det2d.Keys.postpadding]==2, f"Windowed windowed tracklet should have postpadding value 2, but this was {windowed_windowed_tracklet[det2d.Keys.postpadding]}"
     
-    windowed_tracklet2 = det2d.tracklet_window(tracklets[categories.Human][1], window_start=10, window_length=5)
+    windowed_tracklet2 = det2d.tracklet_window(raw_tracklets[categories.Human][1], window_start=10, window_length=5)
     det2d.assert_tracklets_comparable(windowed_tracklet, windowed_tracklet2)
     
-    windowed_tracklets = det2d.tracklets_window(tracklets, window_start=8, window_length=8)
+    windowed_tracklets = det2d.tracklets_window(raw_tracklets, window_start=8, window_length=8)
 
-def test_mask():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    
-    tracklet = tracklets[categories.Human][0]
+def test_mask(categories, raw_tracklets):
+    tracklet = raw_tracklets[categories.Human][0]
     interpolated_tracklet = det2d.interpolate_tracklet_gaps(tracklet, confidence_threshold=0.5)
     windowed_tracklet = det2d.tracklet_window(tracklet, window_start=8, window_length=8)
     
-    assert np.all(det2d.tracklet_confidence_mask(tracklet, confidence_threshold=0.5)==[
-        [True, True, True],
-        [False, False, False],
-        [True, False, False],
-        [True, True, False],
-        [False, True, True]
-    ]), f"tracklet_confidence_mask returns wrong mask for tracklet with id 0"
-    
-    assert np.all(det2d.tracklet_confidence_mask(interpolated_tracklet, confidence_threshold=0.5)==[
-        [True, True, True],
-        [True, True, True],
-        [True, True, True],
-        [True, True, True],
-        [False, True, True]
-    ]), f"tracklet_confidence_mask returns wrong mask for interpolated tracklet with id 0"
-    
-    assert np.all(det2d.tracklet_confidence_mask(windowed_tracklet, confidence_threshold=0.5)==[
-        [False, False, False],
-        [False, False, False],
-        [True, True, True],
-        [False, False, False],
-        [True, False, False],
-        [True, True, False],
-        [False, True, True],
-        [False, False, False]
-    ]), f"tracklet_confidence_mask returns wrong mask for windowed tracklet with id 0"
+    np.testing.assert_array_equal(det2d.tracklet_confidence_mask(tracklet, confidence_threshold=0.5), _EXPECTED_MASK_ID0, strict=True, err_msg=f"tracklet_confidence_mask returns wrong mask for tracklet with id 0")
+    np.testing.assert_array_equal(det2d.tracklet_confidence_mask(interpolated_tracklet, confidence_threshold=0.5), _EXPECTED_MASK_INTERP_ID0, strict=True, err_msg=f"tracklet_confidence_mask returns wrong mask for interpolated tracklet with id 0")
+    np.testing.assert_array_equal(det2d.tracklet_confidence_mask(windowed_tracklet, confidence_threshold=0.5), _EXPECTED_MASK_WINDOWED_ID0, strict=True, err_msg=f"tracklet_confidence_mask returns wrong mask for windowed tracklet with id 0")
+    np.testing.assert_array_equal(det2d.tracklet_unpadded_mask(windowed_tracklet), _EXPECTED_UNPADDED_MASK_WINDOWED_ID0, strict=True, err_msg=f"tracklet_unpadded_mask returns wrong mask for windowed tracklet with ID 0")
+    np.testing.assert_array_equal(det2d.tracklet_confidence_and_unpadded_mask(windowed_tracklet, confidence_threshold=0.5), _EXPECTED_MASK_WINDOWED_ID0, strict=True, err_msg=f"tracklet_confidence_unpadded_mask returns wrong mask for windowed tracklet with id 0")
     
-    assert np.all(det2d.tracklet_unpadded_mask(windowed_tracklet)==[False, False, True, True, True, True, True, False]), f"tracklet_unpadded_mask returns wrong mask for windowed tracklet with ID 0"
-    assert np.all(det2d.tracklet_confidence_and_unpadded_mask(windowed_tracklet, confidence_threshold=0.5)==[
-        [False, False, False],
-        [False, False, False],
-        [True, True, True],
-        [False, False, False],
-        [True, False, False],
-        [True, True, False],
-        [False, True, True],
-        [False, False, False]
-    ]), f"tracklet_confidence_unpadded_mask returns wrong mask for windowed tracklet with id 0"
+def test_stack(categories, raw_tracklets):
+    human_tracklets = raw_tracklets[categories.Human]
     
-def test_stack():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    human_tracklets = tracklets[categories.Human]
-    
-    try:
+    with pytest.raises(AssertionError): # stack_tracklets should throw an error for unequal tracklet lengths
         det2d.stack_tracklets(human_tracklets)
-    except:
-        pass
-    else:
-        raise AssertionError("stack_tracklets should throw an error for unequal tracklet lengths, but didn't")
     
     stacked_human_tracklets = det2d.stack_tracklets(human_tracklets, window=True)
     assert set(stacked_human_tracklets[det2d.Keys.ids])=={0,1,2}, f"Expected stacked_human_tracklets['ids'] to be (0,1,2), but it was {stacked_human_tracklets[det2d.Keys.ids]}"
     assert stacked_human_tracklets[det2d.Keys.start]==10, f"Expected stacked_human_tracklets['start'] to be 10, but it was {stacked_human_tracklets[det2d.Keys.start]}"
-    assert np.all(stacked_human_tracklets[det2d.Keys.prepaddings]==[0,0,2]), f"Expected stacked_human_tracklets['prepadding'] to be [0,0,2], but it was {stacked_human_tracklets[det2d.Keys.prepaddings]}"
-    assert np.all(stacked_human_tracklets[det2d.Keys.postpaddings]==[0,1,1]), f"Expected stacked_human_tracklets['postpadding'] to be [0,1,1], but it was {stacked_human_tracklets[det2d.Keys.postpaddings]}"
+    np.testing.assert_array_equal(stacked_human_tracklets[det2d.Keys.prepaddings], [0,0,2], err_msg=f"Expected stacked_human_tracklets['prepadding'] to be [0,0,2], but it was {stacked_human_tracklets[det2d.Keys.prepaddings]}")
+    np.testing.assert_array_equal(stacked_human_tracklets[det2d.Keys.postpaddings], [0,1,1], err_msg=f"Expected stacked_human_tracklets['postpadding'] to be [0,1,1], but it was {stacked_human_tracklets[det2d.Keys.postpaddings]}")
     assert stacked_human_tracklets[det2d.Keys.keypoints].shape==(3,5,3,3), f"Expected stacked_human_tracklets['keypoints'] to have shape (n_tracklets,n_frames,n_keypoints,3)=(3,5,3,3), but it was {stacked_human_tracklets[det2d.Keys.keypoints].shape}"
 
-def test_stacked_window():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    stacked_tracklets = det2d.stack_tracklets(tracklets[categories.Human], window=True)
+def test_stacked_window(categories, raw_tracklets):
+    stacked_tracklets = det2d.stack_tracklets(raw_tracklets[categories.Human], window=True)
     
     windowed_stacked_tracklets = det2d.stacked_tracklets_window(stacked_tracklets, window_start=8, window_length=8)
     assert windowed_stacked_tracklets[det2d.Keys.start]==8, f"Windowed stacked tracklets start frame should be 8, but was {windowed_stacked_tracklets[det2d.Keys.start]}"
     assert windowed_stacked_tracklets[det2d.Keys.keypoints].shape==(3,8,3,3), f"Windowed stacked tracklets keypoints should have shape (3,8,3,3), but this was {windowed_stacked_tracklets[det2d.Keys.keypoints].shape}"
-    assert np.all(windowed_stacked_tracklets[det2d.Keys.keypoints][:,0:2,:,:]==0), f"Windowed stacked tracklets start should be filled with zeroes, but wasn't"
-    assert np.all(windowed_stacked_tracklets[det2d.Keys.keypoints][:,7,:,:]==0), f"Windowed stacked tracklets end should be filled with zeroes, but wasn't"
-    assert np.all(windowed_stacked_tracklets[det2d.Keys.prepaddings]==stacked_tracklets[det2d.Keys.prepaddings]+2), f"Windowed stacked tracklets should have prepadding values {stacked_tracklets[det2d.Keys.prepaddings]+2}, but this was {windowed_stacked_tracklets[det2d.Keys.prepaddings]}"
-    assert np.all(windowed_stacked_tracklets[det2d.Keys.postpaddings]==stacked_tracklets[det2d.Keys.postpaddings]+1), f"Windowed stacked tracklets should have postpadding values {stacked_tracklets[det2d.Keys.postpaddings]+1}, but this was {windowed_stacked_tracklets[det2d.Keys.postpaddings]}"
+    np.testing.assert_array_equal(windowed_stacked_tracklets[det2d.Keys.keypoints][:,0:2,:,:], 0, err_msg=f"Windowed stacked tracklets start should be filled with zeroes, but wasn't")
+    np.testing.assert_array_equal(windowed_stacked_tracklets[det2d.Keys.keypoints][:,7,:,:], 0, err_msg=f"Windowed stacked tracklets end should be filled with zeroes, but wasn't")
+    np.testing.assert_array_equal(windowed_stacked_tracklets[det2d.Keys.prepaddings], stacked_tracklets[det2d.Keys.prepaddings]+2, err_msg=f"Windowed stacked tracklets should have prepadding values {stacked_tracklets[det2d.Keys.prepaddings]+2}, but this was {windowed_stacked_tracklets[det2d.Keys.prepaddings]}")
+    np.testing.assert_array_equal(windowed_stacked_tracklets[det2d.Keys.postpaddings], stacked_tracklets[det2d.Keys.postpaddings]+1, err_msg=f"Windowed stacked tracklets should have postpadding values {stacked_tracklets[det2d.Keys.postpaddings]+1}, but this was {windowed_stacked_tracklets[det2d.Keys.postpaddings]}")
     
     windowed_windowed_stacked_tracklets = det2d.stacked_tracklets_window(windowed_stacked_tracklets, window_start=7, window_length=10)
-    assert np.all(windowed_windowed_stacked_tracklets[det2d.Keys.prepaddings]==windowed_stacked_tracklets[det2d.Keys.prepaddings]+1), f"Windowed windowed stacked tracklets should have prepadding values {windowed_stacked_tracklets[det2d.Keys.prepaddings]+1}, but this was {windowed_windowed_stacked_tracklets[det2d.Keys.prepaddings]}"
-    assert np.all(windowed_windowed_stacked_tracklets[det2d.Keys.postpaddings]==windowed_stacked_tracklets[det2d.Keys.postpaddings]+1), f"Windowed windowed stacked tracklets should have postpadding values {windowed_stacked_tracklets[det2d.Keys.postpaddings]+1}, but this was {windowed_windowed_stacked_tracklets[det2d.Keys.postpaddings]}"
+    np.testing.assert_array_equal(windowed_windowed_stacked_tracklets[det2d.Keys.prepaddings], windowed_stacked_tracklets[det2d.Keys.prepaddings]+1, err_msg=f"Windowed windowed stacked tracklets should have prepadding values {windowed_stacked_tracklets[det2d.Keys.prepaddings]+1}, but this was {windowed_windowed_stacked_tracklets[det2d.Keys.prepaddings]}")
+    np.testing.assert_array_equal(windowed_windowed_stacked_tracklets[det2d.Keys.postpaddings], windowed_stacked_tracklets[det2d.Keys.postpaddings]+1, err_msg=f"Windowed windowed stacked tracklets should have postpadding values {windowed_stacked_tracklets[det2d.Keys.postpaddings]+1}, but this was {windowed_windowed_stacked_tracklets[det2d.Keys.postpaddings]}")
+    
+def test_release_buffer(categories, raw_tracklets):
+    stacked_tracklets = det2d.stack_tracklets(raw_tracklets[categories.Human], window=True)
     
-def test_stacked_mask():
-    categories = det2d.read_categories(categories_path)
-    tracklets = det2d.read_tracklets(keypoints_path)
-    stacked_tracklets = det2d.stack_tracklets(tracklets[categories.Human], window=True)
-    windowed_tracklets = det2d.tracklets_window(tracklets, window_start=8, window_length=8)[categories.Human]
+    windowed_stacked_tracklets = det2d.stacked_tracklets_window(stacked_tracklets, window_start=8, window_length=8)
+    windowed_keypoints = windowed_stacked_tracklets[det2d.Keys.keypoints]
+    windowed_keypoints_copy = windowed_keypoints.copy()
+    windowed_keypoints[...] = 1
+    det2d.release_buffer(windowed_keypoints)
+    
+    rewindowed_stacked_tracklets = det2d.stacked_tracklets_window(stacked_tracklets, window_start=8, window_length=8)
+    assert rewindowed_stacked_tracklets[det2d.Keys.keypoints] is windowed_keypoints, f"stacked_tracklets_window should reuse a released buffer of the same shape, but didn't"
+    np.testing.assert_array_equal(rewindowed_stacked_tracklets[det2d.Keys.keypoints], windowed_keypoints_copy, err_msg=f"stacked_tracklets_window doesn't return the same keypoints in a reused buffer")
+    
+def test_stacked_mask(categories, raw_tracklets):
+    stacked_tracklets = det2d.stack_tracklets(raw_tracklets[categories.Human], window=True)
+    windowed_tracklets = det2d.tracklets_window(raw_tracklets, window_start=8, window_length=8)[categories.Human]
     windowed_stacked_tracklets = det2d.stacked_tracklets_window(stacked_tracklets, window_start=8, window_length=8)
     
     windowed_stacked_tracklets_mask = det2d.stacked_tracklets_confidence_and_unpadded_mask(windowed_stacked_tracklets, confidence_threshold=0.5)
-    for tracklet_index, (windowed_tracklet_id, windowed_tracklet) in enumerate(windowed_tracklets.items()):
-        assert np.all(windowed_stacked_tracklets_mask[tracklet_index]==det2d.tracklet_confidence_and_unpadded_mask(windowed_tracklet, confidence_threshold=0.5)),\
-            f"stacked_tracklets_confidence_and_unpadded_mask returns wrong mask for tracklet id {windowed_tracklet_id}"
+    expected_mask = np.stack([det2d.tracklet_confidence_and_unpadded_mask(windowed_tracklet, confidence_threshold=0.5) for windowed_tracklet in windowed_tracklets.values()])
+    np.testing.assert_array_equal(windowed_stacked_tracklets_mask, expected_mask, strict=True, err_msg=f"stacked_tracklets_confidence_and_unpadded_mask doesn't match tracklet_confidence_and_unpadded_mask for tracklet ids {tuple(windowed_tracklets.keys())}")
+    
+    for dtype in (np.float16, np.float64, int): # numba only compiles the mask for float32 and float64, other dtypes must give the same mask as NumPy
+        converted_stacked_tracklets = windowed_stacked_tracklets | {det2d.Keys.keypoints: windowed_stacked_tracklets[det2d.Keys.keypoints].astype(dtype)}
+        expected_mask = det2d.stacked_tracklets_confidence_mask(converted_stacked_tracklets, confidence_threshold=0.5) & det2d.stacked_tracklets_unpadded_mask(converted_stacked_tracklets)[:,:,None]
+        np.testing.assert_array_equal(det2d.stacked_tracklets_confidence_and_unpadded_mask(converted_stacked_tracklets, confidence_threshold=0.5), expected_mask, strict=True, err_msg=f"stacked_tracklets_confidence_and_unpadded_mask returns a wrong mask for {np.dtype(dtype)} keypoints")
 
-def test_detection_loader():
+def test_stacked_fill(categories, raw_tracklets):
+    stacked_tracklets = det2d.stack_tracklets(raw_tracklets[categories.Human], window=True)
+    interpolated_stacked_tracklets = det2d.interpolate_stacked_tracklets_gaps(stacked_tracklets, confidence_threshold=0.5)
+    stacked_interpolated_tracklets = det2d.stack_tracklets(det2d.interpolate_tracklets_gaps(raw_tracklets, confidence_threshold=0.5)[categories.Human], window=True)
+    
+    assert interpolated_stacked_tracklets[det2d.Keys.keypoints].shape==stacked_tracklets[det2d.Keys.keypoints].shape, f"Interpolated stacked tracklets keypoints should have shape {stacked_tracklets[det2d.Keys.keypoints].shape}, but this was {interpolated_stacked_tracklets[det2d.Keys.keypoints].shape}"
+    np.testing.assert_allclose(interpolated_stacked_tracklets[det2d.Keys.keypoints], stacked_interpolated_tracklets[det2d.Keys.keypoints], rtol=1e-5, atol=1e-8, err_msg=f"interpolate_stacked_tracklets_gaps doesn't match interpolate_tracklets_gaps")
+    np.testing.assert_array_equal(interpolated_stacked_tracklets[det2d.Keys.prepaddings], stacked_tracklets[det2d.Keys.prepaddings], err_msg=f"interpolate_stacked_tracklets_gaps shouldn't change the paddings")
+    np.testing.assert_array_equal(interpolated_stacked_tracklets[det2d.Keys.postpaddings], stacked_tracklets[det2d.Keys.postpaddings], err_msg=f"interpolate_stacked_tracklets_gaps shouldn't change the paddings")
+
+@pytest.mark.parametrize("window_index,expected_frames", [(0,(10,11,12)), (1,(12,13,14)), (2,(14,))])
+def test_detection_loader_window(detection_loader_windows, window_index, expected_frames):
+    assert tuple(detection_loader_windows[window_index].keys())==expected_frames, f"detection_loader window {window_index} must contain keys {expected_frames}, but this was {tuple(detection_loader_windows[window_index].keys())}"
+
+def test_detection_loader(keypoints_path, loader_windows, detection_loader_windows):
+    Keys = det2d.Keys
     detection_loader = det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2)
     assert len(detection_loader)==3, f"detection_loader must represent 3 windows, but this was {len(detection_loader)}"
+    assert len(detection_loader_windows)==3, f"detection_loader must stop after 3 windows, but yielded {len(detection_loader_windows)}"
     
-    detection_loader = iter(detection_loader)
-    detections = next(detection_loader)
-    assert tuple(detections.keys())==(10,11,12), f"detection_loader first window must contain keys (10,11,12), but this was {tuple(detections.keys())}"
-    detections = next(detection_loader)
-    assert tuple(detections.keys())==(12,13,14), f"detection_loader second window must contain keys (12,13,14), but this was {tuple(detections.keys())}"
-    detections = next(detection_loader)
-    assert tuple(detections.keys())==(14,), f"detection_loader third window must contain only key (14), but this was {tuple(detections.keys())}"
-    detections = detections.copy()
-    try:
-        next(detection_loader)
-    except StopIteration:
-        pass
-    else:
-        raise AssertionError("detection_loader must raise a StopIteration on the fourth call, but didn't")
-        
-    detection_loader_2 = det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2, keypoint_indices={0: range(2)})
-    detection_loader_2 = iter(detection_loader_2)
-    detections_2 = next(detection_loader_2)
-    detections_2 = next(detection_loader_2)
-    detections_2 = next(detection_loader_2)
-    for frame, frame_dict in detections_2.items():
+    detections = detection_loader_windows[2]
+    detections_2 = loader_windows(det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2, keypoint_indices={0: range(2)}))[2]
+    for frame, frame_dict in detections.items():
         assert frame in detections_2.keys(), "Yielded frames with keypoint filter don't match full detection frames"
         for category, category_list in frame_dict.items():
             assert category in detections_2[frame].keys(), "Yielded categories with keypoint filter don't match full detection categories"
             for pose_index, pose_dict in enumerate(category_list):
-                assert pose_dict[det2d.Keys.id] == detections_2[frame][category][pose_index][det2d.Keys.id], "Yielded pose IDs with keypoint filter don't match full detection IDs"
-                assert np.all(pose_dict[det2d.Keys.keypoints][range(2)] == detections_2[frame][category][pose_index][det2d.Keys.keypoints]), "Yielded pose keypoints with keypoint filter don't match sampled full detections"
-    
-def test_tracklet_loader():
+                assert pose_dict[Keys.id] == detections_2[frame][category][pose_index][Keys.id], "Yielded pose IDs with keypoint filter don't match full detection IDs"
+                np.testing.assert_array_equal(pose_dict[Keys.keypoints][range(2)], detections_2[frame][category][pose_index][Keys.keypoints], err_msg="Yielded pose keypoints with keypoint filter don't match sampled full detections")
+
+@pytest.mark.parametrize("window_index,expected_ids", [(0,[0,1]), (1,[0,1,2]), (2,[0,])])
+def test_tracklet_loader_window(tracklet_loader_windows, window_index, expected_ids):
+    assert sorted(tracklet_loader_windows[window_index][0].keys())==expected_ids, f"tracklet_loader window {window_index} must contain keys {tuple(expected_ids)} in Human category (0), but this was {tuple(tracklet_loader_windows[window_index][0].keys())}"
+
+def test_tracklet_loader(keypoints_path, loader_windows, tracklet_loader_windows):
+    Keys = det2d.Keys
     tracklet_loader = det2d.TrackletLoader(keypoints_path, window_length=2, window_interval=2)
     assert len(tracklet_loader)==3, f"tracklet_loader must represent 3 windows, but this was {len(tracklet_loader)}"
+    assert len(tracklet_loader_windows)==3, f"tracklet_loader must stop after 3 windows, but yielded {len(tracklet_loader_windows)}"
     
-    tracklet_loader = iter(tracklet_loader)
-    tracklets = next(tracklet_loader)
-    assert sorted(tuple(tracklets[0].keys()))==[0,1], f"tracklet_loader first window must contain keys (0,1) in Human category (0), but this was {tuple(tracklets[0].keys())}"
-    tracklets = next(tracklet_loader)
-    assert sorted(tuple(tracklets[0].keys()))==[0,1,2], f"tracklet_loader second window must contain keys (0,1,2) in Human category (0), but this was {tuple(tracklets[0].keys())}"
-    tracklets = next(tracklet_loader)
-    assert sorted(tuple(tracklets[0].keys()))==[0,], f"tracklet_loader third window must contain only key (0) in Human category (0), but this was {tuple(tracklets[0].keys())}"
-    tracklets = tracklets.copy()
-    try:
-        next(tracklet_loader)
-    except StopIteration:
-        pass
-    else:
-        raise AssertionError("tracklet_loader must raise a StopIteration on the fourth call, but didn't")
-        
-    tracklet_loader_2 = det2d.TrackletLoader(keypoints_path, window_length=2, window_interval=2, keypoint_indices={0: range(2)})
-    tracklet_loader_2 = iter(tracklet_loader_2)
-    tracklets_2 = next(tracklet_loader_2)
-    tracklets_2 = next(tracklet_loader_2)
-    tracklets_2 = next(tracklet_loader_2)
+    tracklets = tracklet_loader_windows[2]
+    tracklets_2 = loader_windows(det2d.TrackletLoader(keypoints_path, window_length=2, window_interval=2, keypoint_indices={0: range(2)}))[2]
     for category, category_dict in tracklets.items():
         assert category in tracklets_2.keys(), "Yielded categories with keypoint filter don't match full tracklet categories"
         for id, tracklet_dict in category_dict.items():
             assert id in tracklets_2[category].keys(), "Yielded IDs with keypoint filter don't match full tracklet IDs"
-            assert tracklets_2[category][id][det2d.Keys.start] == tracklet_dict[det2d.Keys.start], "Yielded start frames with keypoint filter don't match full tracklet start frames"
-            assert tracklets_2[category][id][det2d.Keys.prepadding] == tracklet_dict[det2d.Keys.prepadding], "Yielded prepadding with keypoint filter doesn't match full tracklet prepadding"
-            assert tracklets_2[category][id][det2d.Keys.postpadding] == tracklet_dict[det2d.Keys.postpadding], "Yielded postpadding with keypoint filter doesn't match full tracklet postpadding"
-            assert np.all(tracklets_2[category][id][det2d.Keys.keypoints] == tracklet_dict[det2d.Keys.keypoints][:,range(2)]), "Yielded keypoints with keypoint filter don't match sampled full tracklet keypoints"
\ No newline at end of file
+            assert tracklets_2[category][id][Keys.start] == tracklet_dict[Keys.start], "Yielded start frames with keypoint filter don't match full tracklet start frames"
+            assert tracklets_2[category][id][Keys.prepadding] == tracklet_dict[Keys.prepadding], "Yielded prepadding with keypoint filter doesn't match full tracklet prepadding"
+            assert tracklets_2[category][id][Keys.postpadding] == tracklet_dict[Keys.postpadding], "Yielded postpadding with keypoint filter doesn't match full tracklet postpadding"
+            np.testing.assert_array_equal(tracklets_2[category][id][Keys.keypoints], tracklet_dict[Keys.keypoints][:,range(2)], err_msg="Yielded keypoints with keypoint filter don't match sampled full tracklet keypoints")
+
+def test_loader_keypoint_mask(keypoints_path, loader_windows, detection_loader_windows, tracklet_loader_windows):
+    Keys = det2d.Keys
+    detections = loader_windows(det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2, keypoint_indices={0: [True, False, True]}))[2]
+    for frame, frame_dict in detection_loader_windows[2].items():
+        for pose_index, pose_dict in enumerate(frame_dict[0]):
+            np.testing.assert_array_equal(detections[frame][0][pose_index][Keys.keypoints], pose_dict[Keys.keypoints][[0,2]], strict=True, err_msg="DetectionLoader with a boolean keypoint mask doesn't load the masked keypoints")
+    
+    tracklets = loader_windows(det2d.TrackletLoader(keypoints_path, window_length=2, window_interval=2, keypoint_indices={0: np.array([True, False, True])}))[2]
+    for id, tracklet_dict in tracklet_loader_windows[2][0].items():
+        np.testing.assert_array_equal(tracklets[0][id][Keys.keypoints], tracklet_dict[Keys.keypoints][:,[0,2]], strict=True, err_msg="TrackletLoader with a boolean keypoint mask doesn't load the masked keypoints")
+
+def test_loader_line_cache(keypoints_path, loader_windows, detection_loader_windows, monkeypatch):
+    n_parsed_lines = 0
+    parse_line = det2d.loader._parse_line
+    def counting_parse_line(line):
+        nonlocal n_parsed_lines
+        n_parsed_lines += 1
+        return parse_line(line)
+    monkeypatch.setattr(det2d.loader, '_parse_line', counting_parse_line)
+    
+    detection_loader = det2d.DetectionLoader(keypoints_path, window_length=3, window_interval=2, cache_lines=True)
+    for detections in detection_loader:
+        for frame_dict in detections.values():
+            for category_list in frame_dict.values():
+                for pose_dict in category_list: pose_dict[det2d.Keys.keypoints][...] = -1 # Modifying a window must not modify the cached lines
+    assert n_parsed_lines==detection_loader.n_frames, f"detection_loader must parse every line once, but parsed {n_parsed_lines} lines for {detection_loader.n_frames} frames"
+    
+    cached_windows = loader_windows(detection_loader)
+    assert n_parsed_lines==detection_loader.n_frames, f"detection_loader with cache_lines=True must not parse lines again, but parsed {n_parsed_lines-detection_loader.n_frames} more lines"
+    for detections, cached_detections in zip(detection_loader_windows, cached_windows, strict=True):
+        for frame, frame_dict in detections.items():
+            for category, category_list in frame_dict.items():
+                for pose_dict, cached_pose_dict in zip(category_list, cached_detections[frame][category], strict=True):
+                    np.testing.assert_array_equal(cached_pose_dict[det2d.Keys.keypoints], pose_dict[det2d.Keys.keypoints], err_msg="Cached detections were modified by an earlier window")
+
+def test_tracklet_loader_trim(keypoints_path, raw_detections, raw_tracklets, loader_windows):
+    Keys = det2d.Keys
+    tracklets = raw_tracklets[0]
+    windows = loader_windows(det2d.TrackletLoader(keypoints_path, window_length=3, window_interval=1))
+    frames = sorted(raw_detections.keys())
+    assert len(windows)==len(frames), f"tracklet_loader with window_interval 1 must yield {len(frames)} windows, but yielded {len(windows)}"
+    
+    for window_index, window in enumerate(windows):
+        window_frames = frames[window_index:window_index+3]
+        for id, tracklet in tracklets.items():
+            detected_frames = [frame for frame in window_frames if id in {pose[Keys.id] for pose in raw_detections[frame][0]}]
+            if len(detected_frames)==0:
+                assert id not in window[0], f"Tracklet {id} should not be in window {window_index}, since it isn't detected there"
+                continue
+            
+            start, stop = max(tracklet[Keys.start], window_frames[0]), detected_frames[-1]+1
+            assert window[0][id][Keys.start]==start, f"Tracklet {id} in window {window_index} should start at frame {start}, but started at {window[0][id][Keys.start]}"
+            np.testing.assert_array_equal(window[0][id][Keys.keypoints], tracklet[Keys.keypoints][start-tracklet[Keys.start]:stop-tracklet[Keys.start]], err_msg=f"Trimmed tracklet {id} in window {window_index} doesn't match the full tracklet")
+
+@pytest.mark.parametrize("fill_function", [det2d.zero_tracklet_gaps, det2d.interpolate_tracklet_gaps])
+def test_tracklet_loader_gap(tmp_path, fill_function):
+    Keys = det2d.Keys
+    path = str(tmp_path/"gap.det2d.json")
+    with open(path, 'w') as file: # Frames 2-19 are missing, so the tracklet keypoints outgrow their initial buffer when the gap is filled
+        file.write('{\n\t"0":{"0":[{"keypoints":[0,0,1.0,5,5,1.0],"id": 0}]},\n\t"1":{"0":[{"keypoints":[1,2,1.0,5,5,0.1],"id": 0}]},\n\t"20":{"0":[{"keypoints":[20,40,1.0,6,6,1.0],"id": 0}]}\n}')
+    
+    tracklet = det2d.read_tracklets(path, fill_function=fill_function, confidence_threshold=0.5)[0][0]
+    loaded_tracklet = next(iter(det2d.TrackletLoader(path, window_length=3, window_interval=3, fill_function=fill_function, confidence_threshold=0.5)))[0][0]
+    assert loaded_tracklet[Keys.start]==tracklet[Keys.start], f"Loaded tracklet should start at frame {tracklet[Keys.start]}, but started at {loaded_tracklet[Keys.start]}"
+    assert loaded_tracklet[Keys.keypoints].shape==(21,2,3), f"Loaded tracklet should have keypoints of shape (21,2,3), but this was {loaded_tracklet[Keys.keypoints].shape}"
+    np.testing.assert_allclose(loaded_tracklet[Keys.keypoints], tracklet[Keys.keypoints], rtol=1e-5, atol=1e-8, err_msg=f"Loaded tracklet gaps filled with {fill_function.__name__} don't match read_tracklets")
\ No newline at end of file